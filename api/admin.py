@@ -1,10 +1,13 @@
 from django.contrib import admin
 
-from api.models import Category, Comment, Genre, Review, Title, User
+from api.models import (Category, Comment, Genre, OutboxMessage, Review,
+                        Title, User)
 
 
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'year', 'category', 'description')
+    list_display = ('id', 'name', 'year', 'category', 'description',
+                    'rating')
+    readonly_fields = ('score_sum', 'score_count', 'rating')
     search_fields = ('name',)
     list_filter = ('year',)
     empty_value_display = '-пусто-'
@@ -47,9 +50,18 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'to_email', 'subject', 'created', 'attempts',
+                    'sent')
+    search_fields = ('to_email',)
+    list_filter = ('sent',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Comment, CommentsAdmin)
 admin.site.register(Review, ReviewsAdmin)
 admin.site.register(User, UserAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,184 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.db.models.functions import Cast
+
+from api.models import Comment, Review, ScoreCounter, Title
+
+SCORES = range(1, 11)
+
+
+def shift_rating(title_id, score_delta, count_delta):
+    """Apply a review delta to the stored rating of a title in one UPDATE."""
+    new_sum = F('score_sum') + score_delta
+    new_count = F('score_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        score_sum=new_sum,
+        score_count=new_count,
+        rating=Case(
+            When(score_count__gt=-count_delta,
+                 then=Cast(new_sum, FloatField()) / Cast(new_count,
+                                                         FloatField())),
+            default=None,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def shift_histogram(title_id, score, delta):
+    """Add ``delta`` to the counter of ``score`` for a title."""
+    counters = ScoreCounter.objects.filter(title_id=title_id, score=score)
+    if counters.update(count=F('count') + delta) or delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            ScoreCounter.objects.create(
+                title_id=title_id, score=score, count=delta)
+    except IntegrityError:
+        # Created concurrently by another review of the same score.
+        counters.update(count=F('count') + delta)
+
+
+def shift_comment_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + delta)
+
+
+def build_histogram(counters):
+    histogram = {str(score): 0 for score in SCORES}
+    for counter in counters:
+        histogram[str(counter.score)] = counter.count
+    return histogram
+
+
+def compute_ratings(title_ids=None):
+    """Return ``{title_id: (score_sum, score_count)}`` from the reviews."""
+    reviews = Review.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+    rows = reviews.order_by().values('title_id').annotate(
+        total=Sum('score'), count=Count('id'))
+    return {row['title_id']: (row['total'], row['count']) for row in rows}
+
+
+def rebuild_ratings(title_ids=None, fix=True):
+    """Compare the stored ratings with the reviews and repair the drift.
+
+    Returns the list of titles whose stored values did not match.
+    """
+    live = compute_ratings(title_ids)
+    titles = Title.objects.only('id', 'score_sum', 'score_count', 'rating')
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+
+    stale = []
+    for title in titles.iterator():
+        score_sum, score_count = live.get(title.pk, (0, 0))
+        rating = score_sum / score_count if score_count else None
+        if (title.score_sum, title.score_count, title.rating) != (
+                score_sum, score_count, rating):
+            title.score_sum = score_sum
+            title.score_count = score_count
+            title.rating = rating
+            stale.append(title)
+
+    if fix and stale:
+        Title.objects.bulk_update(
+            stale, ['score_sum', 'score_count', 'rating'], batch_size=500)
+    return stale
+
+
+def rebuild_histograms(title_ids=None, fix=True):
+    """Compare the score counters with the reviews and repair the drift.
+
+    Returns ``(title_id, score, stored, live)`` for every mismatch.
+    """
+    reviews = Review.objects.order_by()
+    counters = ScoreCounter.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+        counters = counters.filter(title_id__in=title_ids)
+    live = {
+        (row['title_id'], row['score']): row['count']
+        for row in reviews.values('title_id', 'score').annotate(
+            count=Count('id'))
+    }
+    stored = {
+        (counter.title_id, counter.score): counter
+        for counter in counters.iterator()
+    }
+
+    stale = []
+    for key in live.keys() | stored.keys():
+        counter = stored.get(key)
+        stored_count = counter.count if counter else 0
+        if stored_count != live.get(key, 0):
+            stale.append(key + (stored_count, live.get(key, 0)))
+    if not fix or not stale:
+        return stale
+
+    with transaction.atomic():
+        for title_id, score, _, count in stale:
+            counter = stored.get((title_id, score))
+            if counter is None:
+                ScoreCounter.objects.create(
+                    title_id=title_id, score=score, count=count)
+            elif count:
+                counter.count = count
+                counter.save(update_fields=['count'])
+            else:
+                counter.delete()
+    return stale
+
+
+def rebuild_comment_counts(review_ids=None, fix=True):
+    """Compare ``Review.comment_count`` with the comments and repair it.
+
+    Returns ``(review_id, stored, live)`` for every mismatch.
+    """
+    comments = Comment.objects.order_by()
+    reviews = Review.objects.order_by()
+    if review_ids is not None:
+        comments = comments.filter(reviews_id__in=review_ids)
+        reviews = reviews.filter(pk__in=review_ids)
+    live = dict(comments.values('reviews_id').annotate(
+        count=Count('id')).values_list('reviews_id', 'count'))
+    stale = [
+        (review_id, stored, live.get(review_id, 0))
+        for review_id, stored in reviews.values_list(
+            'id', 'comment_count').iterator()
+        if stored != live.get(review_id, 0)
+    ]
+    if fix:
+        with transaction.atomic():
+            for review_id, _, count in stale:
+                Review.objects.filter(pk=review_id).update(
+                    comment_count=count)
+    return stale
+
+
+def title_facets(queryset):
+    """Count the titles of ``queryset`` per genre, category and year."""
+    title_ids = queryset.order_by().values('pk')
+    titles = Title.objects.filter(pk__in=title_ids).order_by()
+    genres = Title.genre.through.objects.filter(
+        title_id__in=title_ids).order_by().values(
+        'genre__slug', 'genre__name').annotate(count=Count('title_id'))
+    categories = titles.filter(category__isnull=False).values(
+        'category__slug', 'category__name').annotate(count=Count('id'))
+    years = titles.values('year').annotate(count=Count('id'))
+    return {
+        'genre': [
+            {'slug': row['genre__slug'], 'name': row['genre__name'],
+             'count': row['count']}
+            for row in genres.order_by('genre__slug')
+        ],
+        'category': [
+            {'slug': row['category__slug'], 'name': row['category__name'],
+             'count': row['count']}
+            for row in categories.order_by('category__slug')
+        ],
+        'year': [
+            {'year': row['year'], 'count': row['count']}
+            for row in years.order_by('year')
+        ],
+    }
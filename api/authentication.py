@@ -0,0 +1,166 @@
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import User, UserRole
+from api.revocation import revocation_list
+
+
+def add_user_claims(token, user):
+    """Embed what the permissions need so requests skip the user query."""
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['ver'] = user.token_version
+    return token
+
+
+def version_id(user_id, version):
+    """Denylist entry of the tokens issued with ``User.token_version``."""
+    return f'user:{user_id}:{version}'
+
+
+def revoke_token_version(user_id, version):
+    """Reject the access tokens issued with the claims of ``version``.
+
+    Refresh tokens reload the user, so only access tokens can still be
+    around with the old claims.
+    """
+    revocation_list.revoke_id(
+        version_id(user_id, version),
+        timezone.now() + api_settings.ACCESS_TOKEN_LIFETIME)
+
+
+def issue_tokens(user, refresh=None):
+    """Return a refresh token with the user claims and its access token.
+
+    The access token remembers its refresh token (``rjti``), so revoking
+    the refresh token also rejects the access tokens issued from it.
+    """
+    refresh = add_user_claims(refresh or RefreshToken.for_user(user), user)
+    access = refresh.access_token
+    access['rjti'] = refresh[api_settings.JTI_CLAIM]
+    return refresh, access
+
+
+def read_refresh_token(raw_token):
+    """Validate a refresh token and load its user for fresh claims."""
+    try:
+        refresh = RefreshToken(raw_token)
+    except TokenError as error:
+        raise InvalidToken(error.args[0])
+    if revocation_list.is_revoked(refresh[api_settings.JTI_CLAIM]):
+        raise InvalidToken('Токен отозван')
+    user = User.objects.filter(
+        pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+    if user is None:
+        raise AuthenticationFailed('Пользователь не найден',
+                                   code='user_not_found')
+    return refresh, user
+
+
+class UserCache:
+    """Per-process LRU of ``User`` rows for the code that needs the model.
+
+    Entries are dropped by the ``User`` signals of this process; a lookup
+    with the ``role`` of a token also reloads rows changed elsewhere once a
+    token with the new role is presented.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.users = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id, role=None):
+        with self.lock:
+            user = self.users.get(user_id)
+            if user is not None and role in (None, user.role):
+                self.users.move_to_end(user_id)
+                return copy.copy(user)
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            with self.lock:
+                self.users[user_id] = user
+                self.users.move_to_end(user_id)
+                while len(self.users) > self.size:
+                    self.users.popitem(last=False)
+            user = copy.copy(user)
+        return user
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE)
+
+
+class ClaimsUser(TokenUser):
+    """Request user backed by the token claims instead of a ``User`` row.
+
+    Changing the role, staff status or activity of a user revokes the
+    tokens issued with the old claims (see ``revoke_token_version``).
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', UserRole.USER)
+
+    @property
+    def is_moderator(self):
+        return self.role == UserRole.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == UserRole.ADMIN or self.is_staff
+
+    @cached_property
+    def user(self):
+        user = user_cache.get(self.id, self.role)
+        if user is None:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found')
+        return user
+
+
+def get_full_user(user):
+    """Return the ``User`` row behind ``request.user``."""
+    if isinstance(user, ClaimsUser):
+        return user.user
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if (revocation_list.is_revoked(token.get(api_settings.JTI_CLAIM))
+                or revocation_list.is_revoked(token.get('rjti'))
+                or 'ver' in token and revocation_list.is_revoked(version_id(
+                    token.get(api_settings.USER_ID_CLAIM), token['ver']))):
+            raise InvalidToken('Токен отозван')
+        return token
+
+    def get_user(self, validated_token):
+        if 'role' in validated_token:
+            return ClaimsUser(validated_token)
+        # Tokens issued without the claims still resolve to the model.
+        user = user_cache.get(validated_token.get(api_settings.USER_ID_CLAIM))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found')
+        return user
@@ -0,0 +1,163 @@
+from django.db import connection, transaction
+
+from api.cache import bump_generation
+from api.changes import record_changes
+from api.models import Category, ChangeKind, Genre, Title
+from api.search import index_titles
+from api.serializers import SlugBulkSerializer, TitleBulkSerializer
+
+TitleGenre = Title.genre.through
+# Field of ``Title`` embedding the genres/categories in its payload.
+TITLE_FIELDS = {Category: 'category', Genre: 'genre'}
+
+
+def validate_items(serializer_class, items):
+    """Split ``items`` into ``(index, validated_data)`` pairs and errors."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+    return valid, errors
+
+
+def catalogue_changed():
+    bump_generation('title-facets')
+    bump_generation('catalogue')
+
+
+def bulk_save_slugged(model, items):
+    """Create or rename genres/categories by slug.
+
+    Returns the saved objects and the per-item errors.
+    """
+    valid, errors = validate_items(SlugBulkSerializer, items)
+    existing = model.objects.in_bulk(
+        [data['slug'] for _, data in valid], field_name='slug')
+
+    seen = set()
+    created, updated = [], []
+    for index, data in valid:
+        if data['slug'] in seen:
+            errors.append({'index': index, 'errors': {
+                'slug': ['Слаг повторяется в запросе']}})
+            continue
+        seen.add(data['slug'])
+        instance = existing.get(data['slug'])
+        if instance is None:
+            created.append(model(**data))
+        else:
+            instance.name = data['name']
+            updated.append(instance)
+
+    with transaction.atomic():
+        model.objects.bulk_create(created)
+        model.objects.bulk_update(updated, ['name'])
+        if updated:
+            record_changes(ChangeKind.TITLE, Title.objects.filter(**{
+                f'{TITLE_FIELDS[model]}__in': updated,
+            }).values_list('pk', flat=True).distinct())
+    if created or updated:
+        catalogue_changed()
+    errors.sort(key=lambda error: error['index'])
+    return created + updated, errors
+
+
+def assign_created_pks(created):
+    """Set the pks of titles inserted by a ``bulk_create`` that could not
+    return them (SQLite before Django 4.0).
+
+    The rows are the newest ones: they were inserted in order and the open
+    transaction holds the write lock, so nobody inserted after them.
+    """
+    if not created:
+        return
+    pks = Title.objects.order_by('-pk').values_list(
+        'pk', flat=True)[:len(created)]
+    for title, pk in zip(created, reversed(pks)):
+        title.pk = pk
+
+
+def bulk_save_titles(items):
+    """Create titles (items without ``id``) or update them (with ``id``).
+
+    Genre and category slugs of the whole batch are resolved with one query
+    each. Returns the ids of the saved titles and the per-item errors.
+    """
+    valid, errors = validate_items(TitleBulkSerializer, items)
+    genre_ids = dict(Genre.objects.filter(slug__in={
+        slug for _, data in valid for slug in data.get('genre', ())
+    }).values_list('slug', 'id'))
+    category_ids = dict(Category.objects.filter(slug__in={
+        data['category'] for _, data in valid if data.get('category')
+    }).values_list('slug', 'id'))
+    existing = Title.objects.in_bulk(
+        [data['id'] for _, data in valid if 'id' in data])
+
+    seen = set()
+    created, updated, genres = [], [], {}
+    for index, data in valid:
+        item_errors = {}
+        unknown = [slug for slug in data.get('genre', ())
+                   if slug not in genre_ids]
+        if unknown:
+            item_errors['genre'] = [f'Жанр не найден: {slug}'
+                                    for slug in unknown]
+        category = data.get('category')
+        if category and category not in category_ids:
+            item_errors['category'] = [f'Категория не найдена: {category}']
+        if 'id' in data and data['id'] not in existing:
+            item_errors['id'] = ['Произведение не найдено']
+        elif 'id' in data and data['id'] in seen:
+            item_errors['id'] = ['Произведение повторяется в запросе']
+        if 'id' not in data and 'year' not in data:
+            item_errors['year'] = ['Обязательное поле.']
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+            continue
+
+        fields = {
+            key: value for key, value in data.items()
+            if key in ('name', 'year', 'description')
+        }
+        if 'category' in data:
+            fields['category_id'] = category_ids.get(category)
+        if 'id' in data:
+            seen.add(data['id'])
+            title = existing[data['id']]
+            for key, value in fields.items():
+                setattr(title, key, value)
+            updated.append(title)
+        else:
+            title = Title(**fields)
+            created.append(title)
+        if 'genre' in data:
+            genres[id(title)] = [
+                genre_ids[slug] for slug in dict.fromkeys(data['genre'])]
+
+    with transaction.atomic():
+        Title.objects.bulk_create(created)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            assign_created_pks(created)
+        Title.objects.bulk_update(
+            updated, ['name', 'year', 'description', 'category_id'])
+        relinked = created + [title for title in updated
+                              if id(title) in genres]
+        TitleGenre.objects.filter(title_id__in=[
+            title.pk for title in updated if id(title) in genres
+        ]).delete()
+        TitleGenre.objects.bulk_create(
+            TitleGenre(title_id=title.pk, genre_id=genre_id)
+            for title in relinked
+            for genre_id in genres.get(id(title), ())
+        )
+
+    saved = created + updated
+    index_titles(saved)
+    record_changes(ChangeKind.TITLE, [title.pk for title in saved])
+    if saved:
+        catalogue_changed()
+    errors.sort(key=lambda error: error['index'])
+    return [title.pk for title in saved], errors
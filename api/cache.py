@@ -0,0 +1,52 @@
+import hashlib
+
+from api.counters import PendingCounts, counters
+
+GENERATION_KEY = 'generation:{}'
+STATS_KEY = 'stats:{}:{}'
+
+
+def get_generation(name):
+    """Current generation of a group of cached entries.
+
+    Entries embed the generation in their keys, so bumping it invalidates
+    the whole group at once without tracking the individual keys. It is
+    kept in the counter store: a culled generation would revive the stale
+    entries of an earlier one.
+    """
+    return counters.get(GENERATION_KEY.format(name))
+
+
+def bump_generation(name):
+    counters.incr(GENERATION_KEY.format(name))
+
+
+def make_key(name, *parts):
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'api:{name}:{get_generation(name)}:{digest}'
+
+
+event_counts = PendingCounts()
+
+
+def count_event(name, event):
+    event_counts.add(STATS_KEY.format(name, event))
+
+
+def get_stats(name, events=('hit', 'miss')):
+    event_counts.flush()
+    return {
+        event: counters.get(STATS_KEY.format(name, event))
+        for event in events
+    }
+
+
+def role_class(user):
+    """Bucket the requester so cached responses are never shared across
+    roles that may see different data."""
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_admin:
+        return 'admin'
+    return user.role
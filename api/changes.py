@@ -0,0 +1,118 @@
+from django.db import connections
+from django.utils import timezone
+
+from api.models import Change, ChangeKind, Comment, Review, Title
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleReadSerializer)
+
+FEED = {
+    ChangeKind.TITLE: (
+        Title.objects.select_related('category').prefetch_related('genre'),
+        TitleReadSerializer,
+    ),
+    ChangeKind.REVIEW: (
+        Review.objects.select_related('author'), ReviewSerializer,
+    ),
+    ChangeKind.COMMENT: (
+        Comment.objects.select_related('author'), CommentSerializer,
+    ),
+}
+
+
+def record_change(kind, object_id, deleted=False):
+    Change.objects.create(kind=kind, object_id=object_id, deleted=deleted)
+
+
+def record_changes(kind, object_ids, deleted=False):
+    Change.objects.bulk_create(
+        Change(kind=kind, object_id=object_id, deleted=deleted)
+        for object_id in object_ids)
+
+
+def record_deletions(kind, queryset):
+    """Log the deletion of the rows of ``queryset`` before they are deleted.
+
+    One INSERT ... SELECT, no ids go through Python. On SQLite it is also
+    the first write of the transaction and takes the write lock, so the
+    rows it logs are the ones the DELETE that follows will find.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(Change._meta.db_table)} '
+            f'({quote("object_id")}, {quote("kind")}, {quote("deleted")}, '
+            f'{quote("created")}) '
+            f'SELECT rows.*, %s, %s, %s FROM ({sql}) rows',
+            [kind, True,
+             connection.ops.adapt_datetimefield_value(timezone.now()),
+             *params])
+
+
+def prune_changes(before):
+    """Delete the entries logged before ``before``; return their number.
+
+    Only the entries before the first one to keep are deleted, so the log
+    keeps a contiguous tail and ``oldest_token`` tells which tokens can
+    still be resumed. The newest entry is kept so that the token of an
+    idle client stays valid.
+    """
+    # Up to the first entry to keep, the newest one at the latest.
+    cutoff = (Change.objects.filter(created__gte=before).order_by('id')
+              .values_list('id', flat=True).first()
+              or Change.objects.order_by('-id')
+              .values_list('id', flat=True).first())
+    if cutoff is None:
+        return 0
+    deleted, _ = Change.objects.filter(id__lt=cutoff).delete()
+    return deleted
+
+
+def oldest_token():
+    """Smallest token that can be resumed, ``None`` if the log is empty.
+
+    A token below it may have missed pruned entries; 0 replays the
+    retained log from its start.
+    """
+    return Change.objects.order_by('id').values_list('id', flat=True).first()
+
+
+def changes_since(token, limit, context):
+    """Return the changes logged after ``token`` and the next token.
+
+    Only the latest change of each object in the page is returned; updated
+    objects carry their current data, deleted ones are tombstones.
+    """
+    changes = list(Change.objects.filter(id__gt=token)[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    latest = {}
+    for change in changes:
+        latest.pop((change.kind, change.object_id), None)
+        latest[(change.kind, change.object_id)] = change
+
+    live = {}
+    for kind, (queryset, _) in FEED.items():
+        ids = [object_id for change_kind, object_id in latest
+               if change_kind == kind]
+        live[kind] = queryset.in_bulk(ids) if ids else {}
+
+    entries = []
+    for (kind, object_id), change in latest.items():
+        instance = live[kind].get(object_id)
+        if not change.deleted and instance is None:
+            # Deleted later on, the tombstone follows in a later page.
+            continue
+        _, serializer_class = FEED[kind]
+        entries.append({
+            'token': str(change.id),
+            'type': kind,
+            'id': object_id,
+            'deleted': change.deleted,
+            'data': (None if change.deleted else
+                     serializer_class(instance, context=context).data),
+        })
+    next_token = changes[-1].id if changes else token
+    return entries, str(next_token), has_more
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Cache invalidation by generation keys only works in a shared cache."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Кэш по умолчанию не разделяется между процессами: сброс кэша '
+        'в одном процессе не виден остальным',
+        hint='Укажите в CACHES общий бэкенд (файлы, memcached)',
+        id='api.W001',
+    )]
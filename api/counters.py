@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS counter (
+    name TEXT PRIMARY KEY,
+    value NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bucket_expires ON bucket (expires);
+'''
+INCREMENT = '''
+INSERT INTO counter (name, value) VALUES (?, ?)
+ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+'''
+
+
+class CounterStore:
+    """Numbers shared by every worker process of this host.
+
+    They live in their own SQLite file, ``COUNTERS_DATABASE``, and not in
+    the cache, which culls its entries when full. An increment is a single
+    UPSERT and a token bucket is read and written under the database write
+    lock, so concurrent workers never lose one another's updates.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def connection(self):
+        path = settings.COUNTERS_DATABASE
+        if getattr(self.local, 'path', None) != path:
+            connection = sqlite3.connect(
+                path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self.local.connection, self.local.path = connection, path
+        return self.local.connection
+
+    def get(self, name, default=0):
+        row = self.connection().execute(
+            'SELECT value FROM counter WHERE name = ?', (name,)).fetchone()
+        return default if row is None else row[0]
+
+    def items(self, prefix):
+        """Counters whose names start with ``prefix``, without it."""
+        rows = self.connection().execute(
+            'SELECT name, value FROM counter '
+            'WHERE substr(name, 1, ?) = ? ORDER BY name',
+            (len(prefix), prefix))
+        return [(name[len(prefix):], value) for name, value in rows]
+
+    def incr(self, name, delta=1):
+        self.incr_many({name: delta})
+
+    def incr_many(self, deltas):
+        if not deltas:
+            return
+        with self.write() as connection:
+            connection.executemany(INCREMENT, deltas.items())
+
+    def take(self, key, capacity, duration, now):
+        """Take a token from the bucket ``key`` holding up to ``capacity``
+        tokens refilled over ``duration`` seconds.
+
+        Return the tokens the bucket held before, one token was taken if
+        there was at least one. A bucket left alone for ``duration`` is
+        full again and its row is dropped.
+        """
+        with self.write() as connection:
+            connection.execute(
+                'DELETE FROM bucket WHERE expires < ?', (now,))
+            row = connection.execute(
+                'SELECT tokens, updated FROM bucket WHERE key = ?',
+                (key,)).fetchone()
+            tokens = capacity
+            if row is not None:
+                # Clocks of other workers may lag behind.
+                elapsed = max(now - row[1], 0)
+                tokens = min(capacity, row[0] + elapsed * capacity / duration)
+            if tokens >= 1:
+                connection.execute(
+                    'INSERT OR REPLACE INTO bucket '
+                    '(key, tokens, updated, expires) VALUES (?, ?, ?, ?)',
+                    (key, tokens - 1, now, now + duration))
+        return tokens
+
+    @contextmanager
+    def write(self):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def delete(self, prefix):
+        with self.write() as connection:
+            connection.execute(
+                'DELETE FROM counter WHERE substr(name, 1, ?) = ?',
+                (len(prefix), prefix))
+
+    def clear(self):
+        with self.write() as connection:
+            connection.execute('DELETE FROM counter')
+            connection.execute('DELETE FROM bucket')
+
+
+counters = CounterStore()
+
+
+class PendingCounts:
+    """Increments kept in memory and added to the counter store every
+    ``COUNTER_FLUSH_INTERVAL`` seconds, not written on every request.
+
+    An idle worker adds its increments with its next request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.pending = Counter()
+            self.flushed = time.monotonic()
+
+    def add(self, key, delta=1):
+        self.add_many({key: delta})
+
+    def add_many(self, deltas):
+        with self.lock:
+            self.pending.update(deltas)
+            if (time.monotonic() - self.flushed
+                    < settings.COUNTER_FLUSH_INTERVAL):
+                return
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed = time.monotonic()
+        counters.incr_many(pending)
@@ -0,0 +1,99 @@
+import csv
+import json
+from itertools import groupby
+from operator import attrgetter
+
+from api.models import Review, Title
+
+CSV_HEADER = (
+    'title_id', 'name', 'year', 'category', 'genres', 'rating',
+    'review_id', 'author', 'score', 'text', 'pub_date',
+)
+
+
+def review_record(review):
+    return {
+        'id': review.id,
+        'author': review.author.username,
+        'score': review.score,
+        'text': review.text,
+        'pub_date': review.pub_date.isoformat(),
+    }
+
+
+def iter_catalogue(chunk_size=500):
+    """Yield every title with its genres and reviews as plain dicts.
+
+    Titles are read in keyset chunks (``id > last``) with their genres.
+    The reviews of a chunk are streamed in ``(title_id, id)`` order with
+    ``iterator()`` and merged into the titles, so memory is bounded by the
+    chunk and the reviews of one title, not by all reviews of the chunk.
+    """
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre').order_by('id')
+    reviews = Review.objects.select_related('author').order_by(
+        'title_id', 'id')
+    last_id = 0
+    while True:
+        chunk = list(titles.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        groups = groupby(reviews.filter(
+            title_id__gte=chunk[0].id, title_id__lte=chunk[-1].id,
+        ).iterator(chunk_size=chunk_size), key=attrgetter('title_id'))
+        group = next(groups, None)
+        for title in chunk:
+            # Skip reviews of titles deleted since the chunk was read.
+            while group and group[0] < title.id:
+                group = next(groups, None)
+            title_reviews = []
+            if group and group[0] == title.id:
+                title_reviews = [review_record(review)
+                                 for review in group[1]]
+                group = next(groups, None)
+            yield {
+                'id': title.id,
+                'name': title.name,
+                'year': title.year,
+                'description': title.description,
+                'category': title.category.slug if title.category else None,
+                'genres': [genre.slug for genre in title.genre.all()],
+                'rating': title.rating,
+                'reviews': title_reviews,
+            }
+        last_id = chunk[-1].id
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """File-like object handing each written CSV row back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(records):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for record in records:
+        title = (
+            record['id'], record['name'], record['year'], record['category'],
+            ','.join(record['genres']), record['rating'],
+        )
+        if not record['reviews']:
+            yield writer.writerow(title + (None,) * 5)
+        for review in record['reviews']:
+            yield writer.writerow(title + (
+                review['id'], review['author'], review['score'],
+                review['text'], review['pub_date'],
+            ))
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
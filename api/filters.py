@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from api.models import Title
+from api.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
@@ -9,7 +10,11 @@ class TitleFilter(filters.FilterSet):
                                   lookup_expr='exact')
     genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
     year = filters.CharFilter(field_name='year', lookup_expr='exact')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['name', 'category', 'genre', 'year', ]
+        fields = ['name', 'category', 'genre', 'year', 'search', ]
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
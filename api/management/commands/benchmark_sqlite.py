@@ -0,0 +1,134 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.sqlite import pragma_statements
+
+SCHEMA = (
+    'CREATE TABLE review (id INTEGER PRIMARY KEY, title_id INTEGER, '
+    'score INTEGER, text TEXT)',
+    'CREATE INDEX review_title_idx ON review (title_id)',
+)
+READ_SQL = 'SELECT count(*), avg(score) FROM review WHERE title_id = ?'
+WRITE_SQL = 'INSERT INTO review (title_id, score, text) VALUES (?, ?, ?)'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при параллельных '
+            'чтениях, записях и транзакциях чтение-запись без настроек '
+            'и с SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=6,
+            help='Количество читающих потоков')
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Количество пишущих потоков')
+        parser.add_argument(
+            '--transactions', type=int, default=2,
+            help='Количество потоков с транзакциями: чтение, затем запись')
+        parser.add_argument(
+            '--seconds', type=float, default=5,
+            help='Длительность каждого прогона')
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help='Количество отзывов в тестовой базе')
+        parser.add_argument(
+            '--titles', type=int, default=500,
+            help='Количество произведений в тестовой базе')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"профиль":<10} {"чтений/с":>10} {"записей/с":>10} '
+            f'{"транзакций/с":>13} {"ошибок":>8}')
+        for name, pragmas in (('default', {}),
+                              ('pragmas', settings.SQLITE_PRAGMAS)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                self.create_database(path, pragmas, options)
+                counts = self.run(path, pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{name:<10} {counts["read"] / seconds:>10.0f} '
+                f'{counts["write"] / seconds:>10.0f} '
+                f'{counts["transaction"] / seconds:>13.0f} '
+                f'{counts["error"]:>8}')
+
+    def connect(self, path, pragmas):
+        # Autocommit, like Django: every write is its own transaction.
+        connection = sqlite3.connect(path, isolation_level=None,
+                                     check_same_thread=False)
+        for statement in pragma_statements(pragmas):
+            connection.execute(statement)
+        return connection
+
+    def create_database(self, path, pragmas, options):
+        connection = self.connect(path, pragmas)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute('BEGIN')
+        connection.executemany(WRITE_SQL, (
+            (random.randrange(options['titles']), random.randint(1, 10),
+             'отзыв') for _ in range(options['rows'])))
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        counts = {'read': 0, 'write': 0, 'transaction': 0, 'error': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def worker(kind):
+            connection = self.connect(path, pragmas)
+            done = errors = 0
+            while time.monotonic() < deadline:
+                title_id = random.randrange(options['titles'])
+                review = (title_id, random.randint(1, 10), 'отзыв')
+                try:
+                    if kind == 'read':
+                        connection.execute(READ_SQL, (title_id,)).fetchone()
+                    elif kind == 'write':
+                        connection.execute(WRITE_SQL, review)
+                    else:
+                        # What Django's atomic() does: a deferred BEGIN, so
+                        # the read lock is upgraded by the INSERT. Under WAL
+                        # a concurrent commit makes the upgrade fail at once,
+                        # busy_timeout does not wait for it.
+                        connection.execute('BEGIN')
+                        try:
+                            connection.execute(
+                                READ_SQL, (title_id,)).fetchone()
+                            connection.execute(WRITE_SQL, review)
+                            connection.execute('COMMIT')
+                        except sqlite3.OperationalError:
+                            connection.execute('ROLLBACK')
+                            raise
+                except sqlite3.OperationalError:
+                    # "database is locked" once the busy timeout runs out.
+                    errors += 1
+                else:
+                    done += 1
+            connection.close()
+            with lock:
+                counts[kind] += done
+                counts['error'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=(kind,))
+            for kind, count in (('read', options['readers']),
+                                ('write', options['writers']),
+                                ('transaction', options['transactions']))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
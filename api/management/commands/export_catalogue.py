@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.export import EXPORT_FORMATS, iter_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Выгружает произведения с жанрами, категориями и отзывами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', choices=sorted(EXPORT_FORMATS), default='ndjson',
+            help='Формат выгрузки')
+        parser.add_argument(
+            '--file', help='Файл для выгрузки, по умолчанию stdout')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Количество произведений, читаемых за один запрос')
+
+    def handle(self, *args, **options):
+        lines, _ = EXPORT_FORMATS[options['output']]
+        records = iter_catalogue(options['chunk_size'])
+        if not options['file']:
+            for line in lines(records):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['file'], 'w', encoding='utf-8',
+                  newline='') as target:
+            target.writelines(lines(records))
@@ -0,0 +1,209 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from api.aggregates import (rebuild_comment_counts, rebuild_histograms,
+                            rebuild_ratings)
+from api.cache import bump_generation
+from api.changes import record_changes
+from api.models import (Category, ChangeKind, Comment, Genre, Review, Title,
+                        User)
+from api.search import rebuild_index
+
+TitleGenre = Title.genre.through
+
+# Entries of the change log for the loaded rows, as the signals of a save
+# would record them.
+CHANGES = {
+    Title: ((ChangeKind.TITLE, 'pk'),),
+    TitleGenre: ((ChangeKind.TITLE, 'title_id'),),
+    Review: ((ChangeKind.REVIEW, 'pk'), (ChangeKind.TITLE, 'title_id')),
+    Comment: ((ChangeKind.COMMENT, 'pk'), (ChangeKind.REVIEW, 'reviews_id')),
+}
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV файлов каталога data/ в базу'
+
+    sources = (
+        ('users.csv', User, 'build_user'),
+        ('category.csv', Category, 'build_category'),
+        ('genre.csv', Genre, 'build_genre'),
+        ('titles.csv', Title, 'build_title'),
+        ('genre_title.csv', TitleGenre, 'build_title_genre'),
+        ('review.csv', Review, 'build_review'),
+        ('comments.csv', Comment, 'build_comment'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Каталог с CSV файлами')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном bulk_create')
+        parser.add_argument(
+            '--drop-indexes', action='store_true',
+            help='Удалить вторичные индексы на время загрузки (SQLite)')
+
+    def handle(self, *args, **options):
+        if options['drop_indexes'] and connection.vendor != 'sqlite':
+            raise CommandError('--drop-indexes поддерживается только SQLite')
+        self.batch_size = options['batch_size']
+        # CSV ids are kept as primary keys, the maps record which of them
+        # exist so that rows with dangling references are skipped.
+        self.ids = {
+            model: set(model.objects.values_list('pk', flat=True).iterator())
+            for _, model, _ in self.sources
+        }
+        self.review_pairs = set(
+            Review.objects.values_list('title_id', 'author_id').iterator())
+        self.password = make_password(None)
+
+        for filename, model, builder in self.sources:
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{filename}: файл не найден, пропущен')
+                continue
+            with self.indexes_dropped(model, options['drop_indexes']):
+                self.load(path, model, getattr(self, builder))
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model for _, model, _ in self.sources]):
+                cursor.execute(sql)
+        rebuild_ratings()
+        rebuild_histograms()
+        rebuild_comment_counts()
+        rebuild_index()
+        bump_generation('title-facets')
+        bump_generation('catalogue')
+
+    def load(self, path, model, builder):
+        started = time.monotonic()
+        loaded = skipped = 0
+        with open(path, encoding='utf-8', newline='') as source, \
+                transaction.atomic(), self.auto_now_disabled(model):
+            rows = csv.DictReader(source)
+            while True:
+                batch = []
+                for row in islice(rows, self.batch_size):
+                    instance = builder(row)
+                    if instance is None:
+                        skipped += 1
+                    else:
+                        batch.append(instance)
+                if not batch:
+                    break
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                self.ids[model].update(instance.pk for instance in batch)
+                for kind, field in CHANGES.get(model, ()):
+                    record_changes(kind, dict.fromkeys(
+                        getattr(instance, field) for instance in batch))
+                loaded += len(batch)
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        self.stdout.write(self.style.SUCCESS(
+            f'{os.path.basename(path)}: {loaded} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с), пропущено {skipped}'))
+
+    @contextmanager
+    def auto_now_disabled(self, model):
+        """Keep ``pub_date`` from the file instead of the load time."""
+        fields = [field for field in model._meta.concrete_fields
+                  if getattr(field, 'auto_now_add', False)]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+    @contextmanager
+    def indexes_dropped(self, model, drop):
+        if not drop:
+            yield
+            return
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            # Unique indexes stay in place: they enforce integrity while the
+            # rows are inserted.
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = %s AND sql IS NOT NULL "
+                "AND sql NOT LIKE 'CREATE UNIQUE%%'", [table])
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{name}"')
+        try:
+            yield
+        finally:
+            started = time.monotonic()
+            with connection.cursor() as cursor:
+                for _, sql in indexes:
+                    cursor.execute(sql)
+            self.stdout.write(
+                f'{table}: {len(indexes)} индексов восстановлено за '
+                f'{time.monotonic() - started:.2f} с')
+
+    def known(self, model, value):
+        return value and int(value) in self.ids[model]
+
+    def build_user(self, row):
+        return User(
+            id=int(row['id']), username=row['username'], email=row['email'],
+            role=row['role'], bio=row['bio'],
+            first_name=row['first_name'], last_name=row['last_name'],
+            password=self.password)
+
+    def build_category(self, row):
+        return Category(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        category = row.get('category')
+        return Title(
+            id=int(row['id']), name=row['name'], year=int(row['year']),
+            description=row.get('description', ''),
+            category_id=(int(category) if self.known(Category, category)
+                         else None))
+
+    def build_title_genre(self, row):
+        if not (self.known(Title, row['title_id'])
+                and self.known(Genre, row['genre_id'])):
+            return None
+        return TitleGenre(id=int(row['id']), title_id=int(row['title_id']),
+                          genre_id=int(row['genre_id']))
+
+    def build_review(self, row):
+        pair = (int(row['title_id']), int(row['author']))
+        if (pair in self.review_pairs
+                or not self.known(Title, row['title_id'])
+                or not self.known(User, row['author'])):
+            return None
+        self.review_pairs.add(pair)
+        return Review(
+            id=int(row['id']), title_id=int(row['title_id']),
+            author_id=int(row['author']), text=row['text'],
+            score=int(row['score']), pub_date=parse_datetime(row['pub_date']))
+
+    def build_comment(self, row):
+        if not (self.known(Review, row['review_id'])
+                and self.known(User, row['author'])):
+            return None
+        return Comment(
+            id=int(row['id']), reviews_id=int(row['review_id']),
+            author_id=int(row['author']), text=row['text'],
+            pub_date=parse_datetime(row['pub_date']))
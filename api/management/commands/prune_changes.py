@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = ('Удаляет записи журнала изменений старше CHANGES_RETENTION, '
+            'включая метки удалённых объектов')
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(timezone.now() - settings.CHANGES_RETENTION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей журнала: {deleted}'))
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.outbox import prune_outbox
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из очереди письма, отправленные или не доставленные '
+            'раньше OUTBOX_RETENTION')
+
+    def handle(self, *args, **options):
+        deleted = prune_outbox(timezone.now() - settings.OUTBOX_RETENTION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено писем: {deleted}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из списка отозванных токенов записи с истёкшим сроком'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено отозванных токенов: {deleted}'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.aggregates import (rebuild_comment_counts, rebuild_histograms,
+                            rebuild_ratings)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённые рейтинги, счётчики оценок '
+            'и комментариев')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя')
+
+    def handle(self, *args, **options):
+        check = options['check']
+        stale = rebuild_ratings(fix=not check)
+        for title in stale:
+            self.stdout.write(
+                f'{title.pk}: sum={title.score_sum} '
+                f'count={title.score_count} rating={title.rating}')
+        stale_counters = rebuild_histograms(fix=not check)
+        for title_id, score, stored, live in stale_counters:
+            self.stdout.write(
+                f'{title_id}: score={score} stored={stored} live={live}')
+        stale_comments = rebuild_comment_counts(fix=not check)
+        for review_id, stored, live in stale_comments:
+            self.stdout.write(
+                f'review {review_id}: comments stored={stored} live={live}')
+        total = len(stale) + len(stale_counters) + len(stale_comments)
+        if check and total:
+            raise CommandError(
+                f'Счётчики расходятся с данными: {len(stale)} произведений, '
+                f'{len(stale_counters)} счётчиков оценок, '
+                f'{len(stale_comments)} отзывов')
+        verb = 'Найдено' if check else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений: {total}'))
@@ -0,0 +1,195 @@
+import json
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from api.cache import get_stats
+from api.counters import PendingCounts, counters
+
+# Set by ``api.middleware.MetricsMiddleware`` for the current request.
+current = ContextVar('request_metrics', default=None)
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+                   5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = (
+    ('api_request_duration_seconds', 'total', SECONDS_BUCKETS,
+     'Время обработки запроса'),
+    ('api_db_queries', 'queries', QUERY_BUCKETS,
+     'Количество SQL запросов'),
+    ('api_db_duration_seconds', 'sql', SECONDS_BUCKETS,
+     'Время выполнения SQL запросов'),
+    ('api_serialize_duration_seconds', 'serialize', SECONDS_BUCKETS,
+     'Время сериализации, включая вызванные ей запросы'),
+    ('api_render_duration_seconds', 'render', SECONDS_BUCKETS,
+     'Время рендеринга ответа'),
+)
+
+GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def route_label(match):
+    """URL pattern of the resolved view: ``api/v1/titles/<pk>/``.
+
+    DRF routers produce regex patterns, their named groups are shortened
+    to ``<name>`` and the anchors dropped.
+    """
+    if match is None:
+        return 'unmatched'
+    return GROUP.sub(r'<\1>', match.route).lstrip('^').rstrip('$')
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql', 'serialize', 'render', 'serializing',
+                 'total')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = self.serialize = self.render = self.total = 0.0
+        self.serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - start
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.sql * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ))
+
+
+class TimedSerializerMixin:
+    """Add the time spent in ``to_representation`` to the request metrics.
+
+    Only the outermost serializer is timed, nested ones are part of it.
+    """
+
+    def to_representation(self, instance):
+        metrics = current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serialize += time.perf_counter() - start
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = current.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        finally:
+            metrics.render += time.perf_counter() - start
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class Registry:
+    """Histograms of the request metrics by endpoint.
+
+    Each process adds its observations to the counter store every
+    ``COUNTER_FLUSH_INTERVAL`` seconds, so ``/metrics`` served by any
+    worker shows the requests of all of them.
+    """
+    prefix = 'histogram:'
+
+    def __init__(self):
+        self.pending = PendingCounts()
+
+    def key(self, *parts):
+        return self.prefix + json.dumps(parts)
+
+    def observe(self, method, route, metrics):
+        deltas = {}
+        for name, field, buckets, _ in HISTOGRAMS:
+            value = getattr(metrics, field)
+            bucket = bisect_left(buckets, value)
+            deltas[self.key(name, method, route, bucket)] = 1
+            deltas[self.key(name, method, route, 'sum')] = value
+            deltas[self.key(name, method, route, 'count')] = 1
+        self.pending.add_many(deltas)
+
+    def clear(self):
+        self.pending.clear()
+        counters.delete(self.prefix)
+
+    def collect(self):
+        self.pending.flush()
+        buckets = {name: buckets for name, _, buckets, _ in HISTOGRAMS}
+        series = {}
+        for key, value in counters.items(self.prefix):
+            name, method, route, part = json.loads(key)
+            histogram = series.setdefault((name, method, route), {
+                'counts': [0] * (len(buckets[name]) + 1),
+                'sum': 0, 'count': 0})
+            if isinstance(part, int):
+                histogram['counts'][part] = value
+            else:
+                histogram[part] = value
+        return sorted(series.items())
+
+    def render(self):
+        """Return the metrics in the Prometheus text format."""
+        lines = []
+        series = self.collect()
+        for name, _, buckets, description in HISTOGRAMS:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, method, route), histogram in series:
+                if series_name != name:
+                    continue
+                labels = (('method', method), ('route', route))
+                total = 0
+                for bound, count in zip(
+                        buckets + ('+Inf',), histogram['counts']):
+                    total += count
+                    bucket = format_labels(labels + (('le', bound),))
+                    lines.append(f'{name}_bucket{{{bucket}}} {total}')
+                labels = format_labels(labels)
+                lines.append(f'{name}_sum{{{labels}}} {histogram["sum"]}')
+                lines.append(
+                    f'{name}_count{{{labels}}} {histogram["count"]}')
+
+        lines.append('# HELP api_cache_events_total Обращения к кэшу ответов')
+        lines.append('# TYPE api_cache_events_total counter')
+        for event, count in get_stats('catalogue').items():
+            labels = format_labels((('group', 'catalogue'), ('event', event)))
+            lines.append(f'api_cache_events_total{{{labels}}} {count}')
+        scopes = sorted(api_settings.DEFAULT_THROTTLE_RATES)
+        lines.append('# HELP api_throttled_requests_total Отклонённые запросы')
+        lines.append('# TYPE api_throttled_requests_total counter')
+        for scope, count in get_stats('throttle', scopes).items():
+            labels = format_labels((('scope', scope),))
+            lines.append(f'api_throttled_requests_total{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,111 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api import metrics
+from api.authentication import ClaimsJWTAuthentication
+from api.routers import use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'api:replica-pin:{}'
+
+
+def pin_key(request):
+    """Cache key of the client: its user id, or address if anonymous.
+
+    Keyed on the user rather than the token, so the pin survives the
+    refresh of a short-lived access token.
+    """
+    client = f'addr:{request.META.get("REMOTE_ADDR", "")}'
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = header and authentication.get_raw_token(header)
+        if raw_token:
+            token = authentication.get_validated_token(raw_token)
+            client = f'user:{token.get(jwt_settings.USER_ID_CLAIM)}'
+    except AuthenticationFailed:
+        pass
+    return PIN_KEY.format(hashlib.md5(client.encode()).hexdigest())
+
+
+class ReplicaMiddleware:
+    """Serve safe requests from the replicas, writes from the primary.
+
+    A client (its user, or address if anonymous) that wrote keeps reading
+    from the primary for ``REPLICA_PIN_SECONDS``, so replication lag does
+    not hide its own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = pin_key(request)
+        safe = request.method in SAFE_METHODS
+        replica = safe and not cache.get(key)
+        token = use_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+        if response.streaming:
+            # The content is generated, and queried, after this returns.
+            response.streaming_content = self.stream(
+                response.streaming_content, replica)
+        if not safe and response.status_code < 400:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def stream(content, replica):
+        content = iter(content)
+        while True:
+            token = use_replica.set(replica)
+            try:
+                chunk = next(content, None)
+            finally:
+                use_replica.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+
+
+class MetricsMiddleware:
+    """Time SQL, serialization, rendering and the whole request.
+
+    The numbers go to the ``Server-Timing`` header and to the per-endpoint
+    histograms served by ``/metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        request_metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        request_metrics.total = time.perf_counter() - start
+
+        route = metrics.route_label(request.resolver_match)
+        metrics.registry.observe(request.method, route, request_metrics)
+        response['Server-Timing'] = request_metrics.server_timing()
+        return response
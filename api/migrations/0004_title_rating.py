@@ -0,0 +1,41 @@
+# Generated by Django 3.0.5 on 2026-10-17 05:53
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    Review = apps.get_model('api', 'Review')
+    rows = Review.objects.order_by().values('title_id').annotate(
+        total=Sum('score'), count=Count('id'))
+    for row in rows:
+        Title.objects.filter(pk=row['title_id']).update(
+            score_sum=row['total'], score_count=row['count'],
+            rating=row['total'] / row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_remove_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
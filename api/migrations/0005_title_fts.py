@@ -0,0 +1,31 @@
+# Generated by Django 3.0.5 on 2026-10-17 06:20
+
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE api_title_fts USING fts5("
+        "name, description, tokenize='unicode61 remove_diacritics 2')")
+    schema_editor.execute(
+        'INSERT INTO api_title_fts (rowid, name, description) '
+        'SELECT id, name, description FROM api_title')
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS api_title_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
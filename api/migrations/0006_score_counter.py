@@ -0,0 +1,42 @@
+# Generated by Django 3.0.5 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Review = apps.get_model('api', 'Review')
+    ScoreCounter = apps.get_model('api', 'ScoreCounter')
+    rows = Review.objects.order_by().values('title_id', 'score').annotate(
+        count=Count('id'))
+    ScoreCounter.objects.bulk_create(
+        ScoreCounter(title_id=row['title_id'], score=row['score'],
+                     count=row['count'])
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_title_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counters', to='api.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик оценок',
+                'verbose_name_plural': 'Счётчики оценок',
+                'unique_together': {('title', 'score')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
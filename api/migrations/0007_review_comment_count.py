@@ -0,0 +1,30 @@
+# Generated by Django 3.0.5 on 2026-10-17 06:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_comment_counts(apps, schema_editor):
+    Review = apps.get_model('api', 'Review')
+    Comment = apps.get_model('api', 'Comment')
+    rows = Comment.objects.order_by().values('reviews_id').annotate(
+        count=Count('id'))
+    for row in rows:
+        Review.objects.filter(pk=row['reviews_id']).update(
+            comment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_score_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.0.5 on 2026-10-17 11:40
+
+import api.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', api.models.ClaimsUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claim',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Захвачено отправкой'),
+        ),
+    ]
@@ -1,8 +1,14 @@
 import datetime
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Sent with ``versions``, the ``(user_id, token_version)`` pairs whose
+# tokens carry outdated claims after ``UserQuerySet.update()``.
+token_versions_outdated = Signal()
 
 
 class UserRole(models.TextChoices):
@@ -11,11 +17,58 @@ class UserRole(models.TextChoices):
     ADMIN = 'admin'
 
 
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        if not User.CLAIM_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            versions = list(self.values_list('pk', 'token_version'))
+            rows = super().update(
+                token_version=models.F('token_version') + 1, **kwargs)
+            token_versions_outdated.send(
+                sender=self.model, versions=versions, using=self.db)
+        return rows
+
+
+class ClaimsUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     email = models.EmailField('Почта', unique=True, blank=False)
     role = models.CharField('Статус', max_length=20, choices=UserRole.choices,
                             default=UserRole.USER)
     bio = models.TextField('Профиль', max_length=200, blank=True)
+    token_version = models.PositiveIntegerField('Версия токенов', default=0,
+                                                editable=False)
+
+    objects = ClaimsUserManager()
+
+    # Embedded in tokens, changing them revokes the issued tokens.
+    CLAIM_FIELDS = ('role', 'is_staff', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = tuple(
+            instance.__dict__.get(field) for field in cls.CLAIM_FIELDS)
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', None)
+        claims = tuple(getattr(self, field) for field in self.CLAIM_FIELDS)
+        if loaded is not None and None not in loaded and loaded != claims:
+            # The ``User`` signals revoke the tokens of the old version.
+            self.revoked_token_version = self.token_version
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'}
+        # The revocation by the ``post_save`` signal commits with the row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_claims = claims
 
     @property
     def is_moderator(self):
@@ -26,6 +79,27 @@ class User(AbstractUser):
         return self.role == UserRole.ADMIN or self.is_staff
 
 
+class CounterFieldsMixin:
+    """Keep ``save()`` of a loaded row from overwriting ``counter_fields``.
+
+    The counters are only changed by ``F()`` updates, so the values loaded
+    with the instance may be stale; a full-row update leaves them out.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding
+                and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = set(self.counter_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
 class Category(models.Model):
     name = models.CharField('Имя', max_length=100)
     slug = models.SlugField(unique=True)
@@ -50,7 +124,7 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(CounterFieldsMixin, models.Model):
     name = models.CharField('Название', max_length=100, db_index=True)
     year = models.PositiveSmallIntegerField(
         'Год выпуска', blank=True,
@@ -72,6 +146,14 @@ class Title(models.Model):
         Category, on_delete=models.SET_NULL, related_name='titles',
         verbose_name='категория', blank=True, null=True, db_index=True
     )
+    score_sum = models.PositiveIntegerField('Сумма оценок', default=0,
+                                            editable=False)
+    score_count = models.PositiveIntegerField('Количество оценок', default=0,
+                                              editable=False)
+    rating = models.FloatField('Рейтинг', blank=True, null=True,
+                               editable=False)
+
+    counter_fields = ('score_sum', 'score_count', 'rating')
 
     class Meta:
         verbose_name = 'Произведение'
@@ -81,7 +163,7 @@ class Title(models.Model):
         return self.name
 
 
-class Review(models.Model):
+class Review(CounterFieldsMixin, models.Model):
     title = models.ForeignKey(Title, on_delete=models.CASCADE,
                               related_name='reviews',
                               verbose_name='Произведения')
@@ -97,6 +179,25 @@ class Review(models.Model):
     pub_date = models.DateTimeField('Дата публикации отзыва',
                                     auto_now_add=True,
                                     db_index=True)
+    comment_count = models.PositiveIntegerField('Количество комментариев',
+                                                default=0, editable=False)
+
+    counter_fields = ('comment_count',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored title/score so that the rating signals can
+        # apply the delta of an update without re-reading the row.
+        instance._loaded_score = (
+            instance.__dict__.get('title_id'), instance.__dict__.get('score')
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The rating and histogram signals run inside the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text
@@ -104,6 +205,12 @@ class Review(models.Model):
     class Meta:
         unique_together = ['title', 'author']
         ordering = ['pub_date']
+        indexes = [
+            models.Index(fields=['author', 'pub_date'],
+                         name='review_author_pub_date_idx'),
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -119,3 +226,84 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['pub_date']
+        indexes = [
+            models.Index(fields=['author', 'pub_date'],
+                         name='comment_author_pub_date_idx'),
+            models.Index(fields=['reviews', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+        ]
+
+
+class ScoreCounter(models.Model):
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              related_name='score_counters',
+                              verbose_name='Произведение')
+    score = models.PositiveSmallIntegerField('Оценка')
+    count = models.PositiveIntegerField('Количество отзывов', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик оценок'
+        verbose_name_plural = 'Счётчики оценок'
+        unique_together = ['title', 'score']
+
+
+class ChangeKind(models.TextChoices):
+    TITLE = 'title'
+    REVIEW = 'review'
+    COMMENT = 'comment'
+
+
+class Change(models.Model):
+    """Append-only log of writes; its id is the token of the changes feed."""
+    kind = models.CharField('Тип объекта', max_length=20,
+                            choices=ChangeKind.choices)
+    object_id = models.PositiveIntegerField('Идентификатор объекта')
+    deleted = models.BooleanField('Удалён', default=False)
+    created = models.DateTimeField('Время изменения', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Изменения'
+        ordering = ['id']
+
+
+class OutboxMessage(models.Model):
+    """Mail waiting to be sent by ``manage.py send_outbox``."""
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=255)
+    to_email = models.EmailField('Получатель')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после',
+                                      default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+    claim = models.CharField('Захвачено отправкой', max_length=32,
+                             blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['sent', 'send_after'],
+                         name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.to_email}: {self.subject}'
+
+
+class RevokedToken(models.Model):
+    """Denylist of token ids, mirrored in memory by ``api.revocation``."""
+    jti = models.CharField('Идентификатор токена', max_length=255,
+                           unique=True)
+    expires = models.DateTimeField('Истекает')
+
+    class Meta:
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,71 @@
+from django.db import transaction
+
+from api.aggregates import (rebuild_comment_counts, rebuild_histograms,
+                            rebuild_ratings)
+from api.cache import bump_generation
+from api.changes import record_changes, record_deletions
+from api.models import ChangeKind, Comment, Review
+from api.streams import broker, publish_rating
+
+
+def select(queryset, criteria):
+    if 'ids' in criteria:
+        queryset = queryset.filter(pk__in=criteria['ids'])
+    if 'author' in criteria:
+        queryset = queryset.filter(author=criteria['author'])
+    if 'since' in criteria:
+        queryset = queryset.filter(pub_date__gte=criteria['since'])
+    if 'until' in criteria:
+        queryset = queryset.filter(pub_date__lt=criteria['until'])
+    return queryset.order_by()
+
+
+def delete_reviews(criteria):
+    """Delete the selected reviews with their comments.
+
+    Ratings and score counters are recomputed once per affected title.
+    """
+    with transaction.atomic():
+        reviews = select(Review.objects.all(), criteria)
+        comments = Comment.objects.filter(
+            reviews__in=reviews.values('pk')).order_by()
+        record_deletions(ChangeKind.COMMENT, comments)
+        record_deletions(ChangeKind.REVIEW, reviews)
+        title_ids = sorted(reviews.values_list('title_id', flat=True)
+                           .distinct())
+        comment_count = comments._raw_delete(comments.db)
+        review_count = reviews._raw_delete(reviews.db)
+
+        if title_ids:
+            rebuild_ratings(title_ids)
+            rebuild_histograms(title_ids)
+        record_changes(ChangeKind.TITLE, title_ids)
+
+    if title_ids:
+        bump_generation('catalogue')
+    for title_id in title_ids:
+        if broker.has_subscribers(title_id):
+            publish_rating(title_id)
+    return {
+        'reviews': review_count,
+        'comments': comment_count,
+        'titles': title_ids,
+    }
+
+
+def delete_comments(criteria):
+    """Delete the selected comments and recount them once per review."""
+    with transaction.atomic():
+        comments = select(Comment.objects.all(), criteria)
+        record_deletions(ChangeKind.COMMENT, comments)
+        review_ids = sorted(comments.values_list('reviews_id', flat=True)
+                            .distinct())
+        comment_count = comments._raw_delete(comments.db)
+
+        if review_ids:
+            rebuild_comment_counts(review_ids)
+        record_changes(ChangeKind.REVIEW, review_ids)
+    return {
+        'comments': comment_count,
+        'reviews': review_ids,
+    }
@@ -0,0 +1,102 @@
+import datetime
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import OutboxMessage
+
+
+def enqueue_mail(subject, body, from_email, recipient_list):
+    """Store a mail per recipient instead of sending it in the request."""
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(subject=subject, body=body, from_email=from_email,
+                      to_email=recipient)
+        for recipient in recipient_list)
+
+
+def retry_delay(attempts):
+    return datetime.timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def pending_messages(now=None):
+    return OutboxMessage.objects.filter(
+        sent__isnull=True, send_after__lte=now or timezone.now(),
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+
+
+def claim_batch(now, batch_size):
+    """Mark up to ``batch_size`` due messages as taken by this call.
+
+    The conditional ``UPDATE`` lets one worker only take a message; until
+    ``OUTBOX_CLAIM_TIMEOUT`` has passed the others see it as not due, then
+    the messages of a worker that died while sending are due again.
+    """
+    claim = uuid.uuid4().hex
+    pending = pending_messages(now)
+    pending.filter(pk__in=pending.values('pk')[:batch_size]).update(
+        claim=claim,
+        send_after=now + datetime.timedelta(
+            seconds=settings.OUTBOX_CLAIM_TIMEOUT))
+    return list(OutboxMessage.objects.filter(claim=claim))
+
+
+def send_batch(batch_size=None):
+    """Send one batch of due messages over a single backend connection.
+
+    Failed messages are rescheduled with an exponential backoff until
+    ``OUTBOX_MAX_ATTEMPTS`` is reached; the body of a sent message, the
+    confirmation code, is dropped. Returns ``(sent, failed)``.
+    """
+    now = timezone.now()
+    batch = claim_batch(now, batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    sent, failed = [], []
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as error:
+        failed = [(message, error) for message in batch]
+    else:
+        try:
+            for message in batch:
+                mail = EmailMessage(
+                    message.subject, message.body, message.from_email,
+                    [message.to_email], connection=connection)
+                try:
+                    connection.send_messages([mail])
+                except Exception as error:
+                    failed.append((message, error))
+                else:
+                    sent.append(message)
+        finally:
+            connection.close()
+
+    for message in sent:
+        message.sent = now
+        message.body = ''
+        message.claim = ''
+    for message, error in failed:
+        message.attempts += 1
+        message.send_after = now + retry_delay(message.attempts)
+        message.last_error = str(error)
+        message.claim = ''
+    OutboxMessage.objects.bulk_update(sent, ['sent', 'body', 'claim'])
+    OutboxMessage.objects.bulk_update(
+        [message for message, _ in failed],
+        ['attempts', 'send_after', 'last_error', 'claim'])
+    return len(sent), len(failed)
+
+
+def prune_outbox(before):
+    """Delete the messages sent, or given up on, before ``before``."""
+    deleted, _ = OutboxMessage.objects.filter(
+        Q(sent__lt=before)
+        | Q(sent__isnull=True, attempts__gte=settings.OUTBOX_MAX_ATTEMPTS,
+            send_after__lt=before)).delete()
+    return deleted
@@ -0,0 +1,49 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Page number pagination with an opt-in keyset (cursor) mode.
+
+    ``?pagination=cursor`` (or any request carrying ``cursor``) switches to
+    cursor pagination on ``ordering``: pages are fetched with
+    ``WHERE <ordering> > <position>`` instead of ``COUNT(*)`` and ``OFFSET``,
+    and ``next``/``previous`` hold opaque cursors.
+    """
+    ordering = 'id'
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_query_param in request.query_params)
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        paginator.cursor_query_param = self.cursor_query_param
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.get_cursor_paginator()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class PubDatePagination(OptionalCursorPagination):
+    ordering = ('pub_date', 'id')
+
+
+class FeedPagination(CursorPagination):
+    """Newest-first keyset pagination for per-user activity feeds."""
+    ordering = ('-pub_date', '-id')
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -8,7 +9,7 @@ class ReviewCommentPermissions(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         if request.method in ('PATCH', 'DELETE'):
-            return (request.user == obj.author or
+            return (request.user.id == obj.author_id or
                     request.user.is_admin or
                     request.user.is_moderator)
 
@@ -24,9 +25,24 @@ class IsAdminOrSuperUser(permissions.BasePermission):
         return False
 
 
+class IsModeratorOrAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        if request.user.is_authenticated:
+            return request.user.is_admin or request.user.is_moderator
+        return False
+
+
 class IsAdminOrDjangoAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in (
                 'POST', 'DELETE', 'PATCH') and request.user.is_authenticated:
             return request.user.is_admin
         return request.method == 'GET'
+
+
+class CanReadMetrics(permissions.BasePermission):
+    """Admins, or scrapers calling from ``METRICS_ALLOWED_IPS``."""
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        return request.user.is_authenticated and request.user.is_admin
@@ -0,0 +1,122 @@
+import datetime
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size set of strings without false negatives."""
+
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size
+                for index in range(self.hashes))
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self.positions(key))
+
+
+class RevocationList:
+    """Revoked token ids: the ``RevokedToken`` table probed via a filter.
+
+    The filter is built from the table on first use in a process and picks
+    up rows revoked by other processes every ``REVOCATION_SYNC_INTERVAL``
+    seconds; it is rebuilt without the expired ids every
+    ``REVOCATION_REBUILD_INTERVAL`` seconds. Only its rare positive answers
+    are confirmed by the table.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.filter = None
+        self.last_id = 0
+        self.synced = self.built = 0.0
+
+    def sync(self):
+        now = time.monotonic()
+        if (self.filter is not None
+                and now - self.synced < settings.REVOCATION_SYNC_INTERVAL):
+            return
+        # Only the first build waits, later lookups keep using the current
+        # filter while another thread loads the new rows.
+        if not self.lock.acquire(blocking=self.filter is None):
+            return
+        try:
+            self.load(now)
+        finally:
+            self.lock.release()
+
+    def load(self, now):
+        """Add the ids revoked since the last load; called with the lock."""
+        if (self.filter is None or now - self.built
+                >= settings.REVOCATION_REBUILD_INTERVAL):
+            # Rebuilt aside so that the ids of expired tokens drop out
+            # while lookups keep using the complete current filter.
+            bloom = BloomFilter(settings.REVOCATION_FILTER_SIZE,
+                                settings.REVOCATION_FILTER_HASHES)
+            last_id = 0
+            self.built = now
+        else:
+            bloom, last_id = self.filter, self.last_id
+        rows = RevokedToken.objects.filter(
+            id__gt=last_id, expires__gt=timezone.now()
+        ).order_by('id').values_list('id', 'jti')
+        for row_id, jti in rows.iterator():
+            bloom.add(jti)
+            last_id = row_id
+        self.filter, self.last_id, self.synced = bloom, last_id, now
+
+    def is_revoked(self, jti):
+        if not jti:
+            return False
+        self.sync()
+        if jti not in self.filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """Persist the id of ``token``; a second revocation raises
+        ``IntegrityError``."""
+        self.revoke_id(token['jti'], datetime.datetime.fromtimestamp(
+            token['exp'], tz=datetime.timezone.utc))
+
+    def revoke_id(self, jti, expires):
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires=expires)
+        with self.lock:
+            # A filter being rebuilt may have missed the new row, the lock
+            # makes sure it is added to the one that replaces it.
+            if self.filter is None:
+                self.load(time.monotonic())
+            self.filter.add(jti)
+
+
+def purge_expired():
+    """Delete the denylist rows of tokens that have expired anyway."""
+    deleted, _ = RevokedToken.objects.filter(
+        expires__lte=timezone.now()).delete()
+    return deleted
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,31 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set by ``api.middleware.ReplicaMiddleware`` for the current request.
+use_replica = ContextVar('use_replica', default=False)
+
+# Revocations must be seen as soon as they are written.
+PRIMARY_ONLY = {'revokedtoken'}
+
+
+class ReplicaRouter:
+    """Send the reads of safe requests to ``DATABASE_REPLICAS``.
+
+    Writes and all other reads use ``default``. Replicas are expected to
+    have the schema of ``default``, e.g. ``migrate --database=replica``.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and use_replica.get()
+                and model._meta.model_name not in PRIMARY_ONLY):
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
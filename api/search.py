@@ -0,0 +1,78 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'api_title_fts'
+# Matches on the name weigh more than matches in the description.
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+WORD_RE = re.compile(r'\w+')
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Turn user input into an FTS5 query: every word is a quoted prefix."""
+    words = WORD_RE.findall(query.casefold())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index_title(title):
+    index_titles([title])
+
+
+def index_titles(titles, batch_size=500):
+    if not fts_enabled() or not titles:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(titles), batch_size):
+            batch = titles[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                [title.pk for title in batch])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            f'VALUES (%s, %s, %s)',
+            [(title.pk, title.name, title.description) for title in titles])
+
+
+def unindex_title(title_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title_id])
+
+
+def rebuild_index(db_connection=connection):
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            f'SELECT id, name, description FROM api_title')
+
+
+def search_titles(queryset, query):
+    """Filter titles by ``query`` and order them by relevance."""
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    if not fts_enabled():
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query))
+
+    table = queryset.model._meta.db_table
+    rank = RawSQL(
+        f'SELECT {RANK_SQL} FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id', [match],
+        output_field=FloatField())
+    matched = RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    return queryset.filter(pk__in=matched).annotate(
+        search_rank=rank).order_by('search_rank', 'pk')
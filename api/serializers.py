@@ -1,41 +1,56 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models import Avg
 from rest_framework import serializers
 
+from api.aggregates import build_histogram
+from api.metrics import TimedSerializerMixin
 from api.models import Category, Comment, Genre, Review, Title, User
 
 
-class CategorySerializer(serializers.ModelSerializer):
+def wants_histogram(request):
+    """Whether ``?histogram=`` asks for the embedded score histogram."""
+    value = request.query_params.get('histogram', '')
+    return value.lower() in serializers.BooleanField.TRUE_VALUES
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Category
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
-    rating = serializers.SerializerMethodField('get_rating')
+class TitleReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    rating = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(source='score_count',
+                                            read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(many=False, read_only=True)
+    score_histogram = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if not (request and wants_histogram(request)):
+            self.fields.pop('score_histogram')
 
-    def get_rating(self, obj):
-        rating = Review.objects.filter(title_id=obj.pk).aggregate(
-            rating=Avg('score')).get('rating')
-        reviews_exists = Review.objects.exists()
-        return None if not reviews_exists else rating
+    def get_score_histogram(self, obj):
+        return build_histogram(obj.score_counters.all())
 
     class Meta:
         fields = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+            'id', 'name', 'year', 'rating', 'review_count', 'description',
+            'genre', 'category', 'score_histogram'
         )
         model = Title
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class TitleWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
         many=True,
         slug_field='slug',
@@ -54,41 +69,68 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class SlugBulkSerializer(serializers.Serializer):
+    """Validates a genre/category item without the per-item unique check;
+    slugs of the whole batch are resolved at once by ``api.bulk``."""
+    name = serializers.CharField(max_length=100)
+    slug = serializers.SlugField(max_length=50)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False)
+    category = serializers.SlugField(required=False, allow_null=True)
+
+    class Meta:
+        fields = (
+            'id', 'name', 'year', 'description', 'genre', 'category'
+        )
+        model = Title
+
+
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field='username')
-    title = serializers.SlugRelatedField(
-        many=False, read_only=True, slug_field='pk')
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         fields = '__all__'
         model = Review
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if request.method != 'POST':
-            return data
-
-        title_id = self.context.get('view').kwargs.get('title_id')
-        user = self.context.get('request').user
-        queryset = Review.objects.filter(author=user, title=title_id)
-        if queryset.exists():
-            raise serializers.ValidationError('Not Allowed')
-        return data
 
-
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field='username')
 
-    reviews = serializers.SlugRelatedField(
-        many=False, read_only=True, slug_field='pk')
+    reviews = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         fields = '__all__'
         model = Comment
 
 
+class ModerationSerializer(serializers.Serializer):
+    """Selects the reviews or comments of a moderation action."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.BULK_MAX_ITEMS, required=False)
+    author = serializers.SlugRelatedField(
+        slug_field='username', queryset=User.objects.all(), required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                'Укажите ids, author или интервал since/until')
+        return data
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
 class UserEmailSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
 
@@ -98,7 +140,7 @@ class ConfirmationCodeSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
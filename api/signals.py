@@ -0,0 +1,206 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from api.aggregates import (shift_comment_count, shift_histogram,
+                            shift_rating)
+from api.authentication import revoke_token_version, user_cache
+from api.cache import bump_generation
+from api.changes import record_change, record_changes
+from api.models import (Category, ChangeKind, Comment, Genre, Review, Title,
+                        User, token_versions_outdated)
+from api.search import index_title, unindex_title
+from api.serializers import ReviewSerializer
+from api.sqlite import configure_connection
+from api.streams import broker, publish_rating
+
+SEARCH_FIELDS = {'name', 'description'}
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        shift_rating(instance.title_id, instance.score, 1)
+        shift_histogram(instance.title_id, instance.score, 1)
+    else:
+        old_title_id, old_score = getattr(
+            instance, '_loaded_score', (None, None))
+        if old_title_id is None or old_score is None:
+            # The row was loaded without these fields, the rating can only
+            # be fixed by ``rebuild_ratings`` in this case.
+            return
+        if old_title_id != instance.title_id:
+            shift_rating(old_title_id, -old_score, -1)
+            shift_rating(instance.title_id, instance.score, 1)
+        elif old_score != instance.score:
+            shift_rating(instance.title_id, instance.score - old_score, 0)
+        if (old_title_id, old_score) != (instance.title_id, instance.score):
+            shift_histogram(old_title_id, old_score, -1)
+            shift_histogram(instance.title_id, instance.score, 1)
+    instance._loaded_score = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    shift_rating(instance.title_id, -instance.score, -1)
+    shift_histogram(instance.title_id, instance.score, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_comment_count(instance.reviews_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    shift_comment_count(instance.reviews_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    unindex_title(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalogue_changed(sender, **kwargs):
+    bump_generation('title-facets')
+    bump_generation('catalogue')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_generation('title-facets')
+        bump_generation('catalogue')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, **kwargs):
+    # Title payloads embed the rating.
+    bump_generation('catalogue')
+
+
+@receiver(post_save, sender=Title)
+def log_title_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(ChangeKind.TITLE, instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def log_title_deleted(sender, instance, **kwargs):
+    record_change(ChangeKind.TITLE, instance.pk, deleted=True)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def log_slugged_saved(sender, instance, created, raw=False, **kwargs):
+    # Title payloads embed the names of their genres and category.
+    if not created and not raw:
+        record_changes(ChangeKind.TITLE, instance.titles.values_list(
+            'pk', flat=True))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def log_slugged_deleted(sender, instance, **kwargs):
+    # The titles lose it without signals of their own.
+    record_changes(ChangeKind.TITLE, instance.titles.values_list(
+        'pk', flat=True))
+
+
+@receiver(post_save, sender=Review)
+def log_review_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(ChangeKind.REVIEW, instance.pk)
+        # The rating and review count of the title changed too.
+        record_change(ChangeKind.TITLE, instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def log_review_deleted(sender, instance, **kwargs):
+    record_change(ChangeKind.REVIEW, instance.pk, deleted=True)
+    record_change(ChangeKind.TITLE, instance.title_id)
+
+
+@receiver(post_save, sender=Comment)
+def log_comment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(ChangeKind.COMMENT, instance.pk)
+        record_change(ChangeKind.REVIEW, instance.reviews_id)
+
+
+@receiver(post_delete, sender=Comment)
+def log_comment_deleted(sender, instance, **kwargs):
+    record_change(ChangeKind.COMMENT, instance.pk, deleted=True)
+    record_change(ChangeKind.REVIEW, instance.reviews_id)
+
+
+@receiver(post_save, sender=Review)
+def stream_review_saved(sender, instance, created, raw=False, **kwargs):
+    title_id = instance.title_id
+    if raw or not broker.has_subscribers(title_id):
+        return
+
+    def publish():
+        if created:
+            broker.publish(
+                title_id, 'review', ReviewSerializer(instance).data)
+        publish_rating(title_id)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_delete, sender=Review)
+def stream_review_deleted(sender, instance, **kwargs):
+    title_id = instance.title_id
+    if broker.has_subscribers(title_id):
+        transaction.on_commit(lambda: publish_rating(title_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Covers role changes of users still resolved through the user cache.
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_claims_changed(sender, instance, raw=False, **kwargs):
+    version = instance.__dict__.pop('revoked_token_version', None)
+    if version is not None and not raw:
+        revoke_token_version(instance.pk, version)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_token_version(instance.pk, instance.token_version)
+
+
+@receiver(token_versions_outdated, sender=User)
+def user_claims_updated(sender, versions, **kwargs):
+    for user_id, version in versions:
+        revoke_token_version(user_id, version)
+        user_cache.invalidate(user_id)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    configure_connection(connection)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import re
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from api.models import Title
+
+STREAM_PATH = re.compile(r'^/api/v1/titles/(?P<title_id>\d+)/reviews/stream/$')
+
+
+class Broker:
+    """In-process fan-out of review events to the open SSE connections.
+
+    Publishers run in Django's worker threads, subscribers are asyncio
+    queues, so events are handed over with ``call_soon_threadsafe``. Only
+    connections served by this process see the events of this process.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, title_id):
+        subscriber = (asyncio.get_running_loop(),
+                      asyncio.Queue(self.queue_size + 1))
+        with self.lock:
+            self.subscribers.setdefault(title_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, title_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(title_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.subscribers.pop(title_id, None)
+
+    def has_subscribers(self, title_id):
+        return title_id in self.subscribers
+
+    def publish(self, title_id, event, data):
+        message = f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode()
+        with self.lock:
+            subscribers = list(self.subscribers.get(title_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(deliver, queue, message)
+
+
+def deliver(queue, message):
+    # The last slot is kept for the ``None`` sentinel that closes the stream
+    # of a client which cannot keep up, instead of buffering forever.
+    if queue.qsize() < queue.maxsize - 1:
+        queue.put_nowait(message)
+    elif not queue.full():
+        queue.put_nowait(None)
+
+
+broker = Broker()
+
+
+def publish_rating(title_id):
+    title = Title.objects.filter(pk=title_id).values(
+        'id', 'rating', 'score_count').first()
+    if title is not None:
+        broker.publish(title_id, 'rating', {
+            'id': title['id'], 'rating': title['rating'],
+            'review_count': title['score_count'],
+        })
+
+
+async def send_response(send, status, body=b'', content_type=b'text/plain'):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', content_type)]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def review_stream(scope, receive, send, title_id):
+    if scope['method'] != 'GET':
+        await send_response(send, 405, b'Method not allowed')
+        return
+    exists = await sync_to_async(
+        Title.objects.filter(pk=title_id).exists)()
+    if not exists:
+        await send_response(send, 404, b'Not found')
+        return
+
+    subscriber = broker.subscribe(title_id)
+    _, queue = subscriber
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b': connected\n\n',
+                    'more_body': True})
+        disconnect = asyncio.ensure_future(wait_disconnect(receive))
+        while True:
+            message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnect}, return_when=asyncio.FIRST_COMPLETED,
+                timeout=settings.SSE_HEARTBEAT_INTERVAL)
+            if disconnect in done:
+                message.cancel()
+                break
+            if message not in done:
+                message.cancel()
+                body = b': ping\n\n'
+            else:
+                body = message.result()
+                if body is None:
+                    break
+            await send({'type': 'http.response.body', 'body': body,
+                        'more_body': True})
+        if not disconnect.done():
+            disconnect.cancel()
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broker.unsubscribe(title_id, subscriber)
+
+
+def with_review_streams(application):
+    """Serve review streams directly, pass everything else to Django."""
+
+    async def router(scope, receive, send):
+        if scope['type'] == 'http':
+            match = STREAM_PATH.match(scope['path'])
+            if match:
+                await review_stream(
+                    scope, receive, send, int(match.group('title_id')))
+                return
+        await application(scope, receive, send)
+
+    return router
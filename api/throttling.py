@@ -0,0 +1,63 @@
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.cache import count_event
+from api.counters import counters
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket in the counter store, configured by DRF rate strings.
+
+    ``'5/min'`` allows a burst of 5 requests and refills 5 tokens per
+    minute. A bucket is one ``(tokens, timestamp)`` row instead of the
+    request history kept by ``SimpleRateThrottle``, taken from atomically
+    so the limit holds across the worker processes.
+    """
+
+    def get_rate(self):
+        # Read at request time so rate changes in settings apply.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.tokens = counters.take(
+            self.key, self.num_requests, self.duration, self.timer())
+        if self.tokens >= 1:
+            return True
+        count_event('throttle', self.scope)
+        return False
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class UserThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope, 'ident': request.user.pk}
+
+
+class AuthIPThrottle(IPThrottle):
+    scope = 'auth'
+
+
+class WriteIPThrottle(IPThrottle):
+    scope = 'write-ip'
+
+
+class WriteUserThrottle(UserThrottle):
+    scope = 'write-user'
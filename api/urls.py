@@ -3,7 +3,11 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                        ReviewViewSet, TitleViewSet, UserViewSet,
-                       get_confirmation_code, get_jwt_token)
+                       changes_feed, export_catalogue,
+                       get_confirmation_code, get_jwt_token,
+                       moderate_comments, moderate_reviews,
+                       refresh_jwt_token, revoke_jwt_token,
+                       rotate_jwt_token)
 
 router = DefaultRouter()
 router.register('genres', GenreViewSet, basename='Genre')
@@ -20,5 +24,12 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/email/', get_confirmation_code),
     path('v1/auth/token/', get_jwt_token),
+    path('v1/auth/token/refresh/', refresh_jwt_token),
+    path('v1/auth/token/rotate/', rotate_jwt_token),
+    path('v1/auth/token/revoke/', revoke_jwt_token),
+    path('v1/export/', export_catalogue),
+    path('v1/changes/', changes_feed),
+    path('v1/moderation/reviews/', moderate_reviews),
+    path('v1/moderation/comments/', moderate_comments),
     path('v1/users/me/', UserViewSet.as_view({'patch': 'partial_update'})),
 ]
@@ -1,25 +1,46 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken
 
+from api.aggregates import build_histogram, title_facets
+from api.authentication import (get_full_user, issue_tokens,
+                                read_refresh_token)
+from api.bulk import bulk_save_slugged, bulk_save_titles
+from api.cache import count_event, make_key, role_class
+from api.changes import changes_since, oldest_token
+from api.export import EXPORT_FORMATS, iter_catalogue
 from api.filters import TitleFilter
+from api.metrics import registry
 from api.models import Category, Comment, Genre, Review, Title, User
-from api.permissions import (IsAdminOrDjangoAdminOrReadOnly,
-                             IsAdminOrSuperUser, ReviewCommentPermissions)
+from api.moderation import delete_comments, delete_reviews
+from api.outbox import enqueue_mail
+from api.pagination import (FeedPagination, OptionalCursorPagination,
+                            PubDatePagination)
+from api.permissions import (CanReadMetrics, IsAdminOrDjangoAdminOrReadOnly,
+                             IsAdminOrSuperUser, IsModeratorOrAdmin,
+                             ReviewCommentPermissions)
+from api.revocation import revocation_list
 from api.serializers import (CategorySerializer, CommentSerializer,
                              ConfirmationCodeSerializer, GenreSerializer,
+                             ModerationSerializer, RefreshTokenSerializer,
                              ReviewSerializer, TitleReadSerializer,
                              TitleWriteSerializer, UserEmailSerializer,
-                             UserSerializer)
+                             UserSerializer, wants_histogram)
+from api.throttling import AuthIPThrottle, WriteIPThrottle, WriteUserThrottle
 
 
 class ListCreateDestroyViewSet(
@@ -29,17 +50,119 @@ class ListCreateDestroyViewSet(
     pass
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+def bulk_response(data, errors):
+    if not data and errors:
+        response_status = status.HTTP_400_BAD_REQUEST
+    else:
+        response_status = status.HTTP_200_OK
+    return Response({'results': data, 'errors': errors},
+                    status=response_status)
+
+
+def bulk_items(request):
+    if (not isinstance(request.data, list)
+            or len(request.data) > settings.BULK_MAX_ITEMS):
+        raise ValidationError(
+            f'Ожидается список не длиннее {settings.BULK_MAX_ITEMS} '
+            f'элементов')
+    return request.data
+
+
+class BulkSlugMixin:
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        saved, errors = bulk_save_slugged(
+            self.queryset.model, bulk_items(request))
+        serializer = self.get_serializer(saved, many=True)
+        return bulk_response(serializer.data, errors)
+
+
+class CachedListMixin:
+    """Cache list payloads per path, query and requester role.
+
+    Catalogue signals bump the ``catalogue`` generation on every write, so
+    entries are dropped as soon as the underlying rows change. Entries and
+    generations live in the shared default cache, so a write handled by
+    one worker invalidates the responses cached by all of them.
+    """
+    cache_group = 'catalogue'
+
+    def cached(self, handler, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return handler(request, *args, **kwargs)
+        key = make_key(
+            self.cache_group, request.get_host(), request.path,
+            sorted(request.query_params.lists()), role_class(request.user))
+        data = cache.get(key)
+        if data is not None:
+            count_event(self.cache_group, 'hit')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        count_event(self.cache_group, 'miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+
+class CachedReadMixin(CachedListMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+
+class TitleViewSet(CachedReadMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre').order_by('id')
     permission_classes = (IsAdminOrDjangoAdminOrReadOnly,)
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
+    pagination_class = OptionalCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if wants_histogram(self.request):
+            queryset = queryset.prefetch_related('score_counters')
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method in ['PATCH', 'POST']:
             return TitleWriteSerializer
         return TitleReadSerializer
 
+    @action(methods=['GET'], detail=True, url_path='rating-histogram')
+    def rating_histogram(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only('id', 'score_count', 'rating'), pk=pk)
+        return Response({
+            'id': title.id,
+            'rating': title.rating,
+            'count': title.score_count,
+            'histogram': build_histogram(title.score_counters.all()),
+        }, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        params = sorted(request.query_params.lists())
+        key = make_key('title-facets', params)
+        data = cache.get(key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            data = title_facets(queryset)
+            cache.set(key, data, settings.TITLE_FACETS_CACHE_TIMEOUT)
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        title_ids, errors = bulk_save_titles(bulk_items(request))
+        titles = self.get_queryset().in_bulk(title_ids)
+        serializer = TitleReadSerializer(
+            [titles[pk] for pk in title_ids], many=True)
+        return bulk_response(serializer.data, errors)
+
     def perform_update(self, serializer):
         category_slug = self.request.data.get('category', None)
         genre_slug_list = self.request.data.getlist('genre', None)
@@ -48,7 +171,8 @@ class TitleViewSet(viewsets.ModelViewSet):
         serializer.save(genre=genres, category=category)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(BulkSlugMixin, CachedListMixin,
+                   ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrDjangoAdminOrReadOnly,)
@@ -57,7 +181,8 @@ class GenreViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(BulkSlugMixin, CachedListMixin,
+                      ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrDjangoAdminOrReadOnly,)
@@ -66,51 +191,95 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class CreateThrottleMixin:
+    create_throttle_classes = (WriteUserThrottle, WriteIPThrottle)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [throttle() for throttle in self.create_throttle_classes]
+        return super().get_throttles()
+
+
+def check_exists(queryset, **lookup):
+    """Raise 404 unless a row matches, without loading it."""
+    if not queryset.filter(**lookup).exists():
+        raise NotFound()
+
+
+class ReviewViewSet(CreateThrottleMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (ReviewCommentPermissions,)
-    pagination_class = PageNumberPagination
+    pagination_class = PubDatePagination
+
+    def list(self, request, *args, **kwargs):
+        check_exists(Title.objects, pk=self.kwargs.get('title_id'))
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title_id=title.id)
+        title_id = int(self.kwargs.get('title_id'))
+        check_exists(Title.objects, pk=title_id)
+        # The (title, author) unique constraint rejects a second review,
+        # including concurrent ones, without a check-then-insert query.
+        author = get_full_user(self.request.user)
+        try:
+            serializer.save(author=author, title_id=title_id)
+        except IntegrityError:
+            # Other violations, e.g. of the foreign key to a title deleted
+            # meanwhile, are not a duplicate review.
+            if Review.objects.filter(title_id=title_id,
+                                     author=author).exists():
+                raise ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: ['Not Allowed']})
+            check_exists(Title.objects, pk=title_id)
+            raise
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return Review.objects.filter(title_id=title.id)
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')).select_related('author')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CreateThrottleMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (ReviewCommentPermissions,)
-    pagination_class = PageNumberPagination
+    pagination_class = PubDatePagination
+
+    def check_review(self):
+        check_exists(Review.objects, pk=self.kwargs.get('review_id'),
+                     title_id=self.kwargs.get('title_id'))
+
+    def list(self, request, *args, **kwargs):
+        self.check_review()
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, reviews_id=review.id)
+        self.check_review()
+        serializer.save(author=get_full_user(self.request.user),
+                        reviews_id=int(self.kwargs.get('review_id')))
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return Comment.objects.filter(reviews_id=review.id)
+        return Comment.objects.filter(
+            reviews_id=self.kwargs.get('review_id'),
+            reviews__title_id=self.kwargs.get('title_id'),
+        ).select_related('author')
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle])
 def get_confirmation_code(request):
     serializer = UserEmailSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
     email = serializer.data.get('email')
-    user = User.objects.get_or_create(email=email)
+    user, _ = User.objects.get_or_create(email=email)
     confirmation_code = default_token_generator.make_token(user)
     mail_subject = 'Код подтверждения'
     message = f'Ваш код подтверждения: {confirmation_code}'
-    send_mail(
+    enqueue_mail(
         mail_subject,
         message,
         'Yamdb',
         [email],
-        fail_silently=False,
     )
 
     return Response(f'На почту {email} был выслан код подтверждения',
@@ -119,6 +288,7 @@ def get_confirmation_code(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle])
 def get_jwt_token(request):
     serializer = ConfirmationCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -128,15 +298,123 @@ def get_jwt_token(request):
     user = get_object_or_404(User, email=email)
 
     if default_token_generator.check_token(user, confirmation_code):
-        refresh = RefreshToken.for_user(user)
+        refresh, access = issue_tokens(user)
         return Response({
-            'Your token': str(refresh.access_token)},
+            'Your token': str(access),
+            'refresh': str(refresh)},
             status=status.HTTP_200_OK)
 
     return Response({'confirmation_code': 'Неверный код подтверждения'},
                     status=status.HTTP_400_BAD_REQUEST)
 
 
+def refresh_token_from(request):
+    serializer = RefreshTokenSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return read_refresh_token(serializer.validated_data['refresh'])
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def refresh_jwt_token(request):
+    refresh, user = refresh_token_from(request)
+    _, access = issue_tokens(user, refresh)
+    return Response({'Your token': str(access)}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def rotate_jwt_token(request):
+    refresh, user = refresh_token_from(request)
+    try:
+        revocation_list.revoke(refresh)
+    except IntegrityError:
+        # Rotated concurrently, only one of the requests gets new tokens.
+        raise InvalidToken('Токен отозван')
+    refresh, access = issue_tokens(user)
+    return Response({
+        'Your token': str(access),
+        'refresh': str(refresh)},
+        status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def revoke_jwt_token(request):
+    refresh, _ = refresh_token_from(request)
+    try:
+        revocation_list.revoke(refresh)
+    except IntegrityError:
+        pass
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def changes_feed(request):
+    try:
+        since = int(request.query_params.get('since', 0))
+        limit = int(request.query_params.get(
+            'limit', settings.CHANGES_PAGE_SIZE))
+    except ValueError:
+        since = limit = -1
+    if since < 0 or not 0 < limit <= settings.CHANGES_PAGE_SIZE:
+        return Response(
+            {'detail': f'since должен быть токеном из предыдущего ответа, '
+                       f'limit - числом от 1 до {settings.CHANGES_PAGE_SIZE}'},
+            status=status.HTTP_400_BAD_REQUEST)
+    oldest = oldest_token()
+    # ``since`` is the id of the last entry seen, the entries after it
+    # are all retained if it is at most just before the oldest one.
+    if since and oldest is not None and since < oldest - 1:
+        return Response(
+            {'detail': 'Изменения после этого токена удалены по сроку '
+                       'хранения, начните синхронизацию заново'},
+            status=status.HTTP_410_GONE)
+    changes, next_token, has_more = changes_since(
+        since, limit, {'request': request})
+    return Response({
+        'changes': changes,
+        'next': next_token,
+        'has_more': has_more,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrSuperUser])
+def export_catalogue(request):
+    output = request.query_params.get('output', 'ndjson')
+    if output not in EXPORT_FORMATS:
+        return Response({'output': f'Допустимые форматы: '
+                                   f'{", ".join(EXPORT_FORMATS)}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    lines, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(
+        lines(iter_catalogue()), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="catalogue.{output}"')
+    return response
+
+
+def moderate(request, delete):
+    serializer = ModerationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response(delete(serializer.validated_data),
+                    status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsModeratorOrAdmin])
+def moderate_reviews(request):
+    return moderate(request, delete_reviews)
+
+
+@api_view(['POST'])
+@permission_classes([IsModeratorOrAdmin])
+def moderate_comments(request):
+    return moderate(request, delete_comments)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     lookup_field = 'username'
@@ -146,9 +424,45 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(methods=['PATCH', 'GET'], detail=False,
             permission_classes=(IsAuthenticated,))
     def me(self, request):
+        # Always the current row: the request user may come from the token
+        # claims or the per-process user cache.
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = UserSerializer(
-            request.user, data=request.data, partial=True
+            user, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def feed(self, queryset, serializer_class):
+        author_id = User.objects.filter(
+            username=self.kwargs.get('username')).values_list(
+            'id', flat=True).first()
+        if author_id is None:
+            raise NotFound()
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(
+            queryset.filter(author_id=author_id).select_related('author'),
+            self.request, view=self)
+        serializer = serializer_class(
+            page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['GET'], detail=True, permission_classes=(AllowAny,))
+    def reviews(self, request, username=None):
+        return self.feed(Review.objects.all(), ReviewSerializer)
+
+    @action(methods=['GET'], detail=True, permission_classes=(AllowAny,))
+    def comments(self, request, username=None):
+        return self.feed(Comment.objects.all(), CommentSerializer)
+
+
+@api_view(['GET'])
+@permission_classes([CanReadMetrics])
+def metrics(request):
+    """Request metrics in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -39,10 +39,11 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
-    'api',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -81,9 +83,61 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Keep connections open between requests instead of reconnecting
+        # and re-running the pragmas below every time.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Run on every new SQLite connection (see api.sqlite). WAL lets readers
+# work alongside the single writer and synchronous=NORMAL drops the fsync
+# per commit; busy_timeout waits for the write lock instead of failing
+# with "database is locked". It does not cover a transaction that read
+# first: under WAL its upgrade to a write lock fails at once with
+# SQLITE_BUSY when another connection committed meanwhile, and atomic() has
+# no BEGIN IMMEDIATE on Django 3.0, so such transactions may need a retry.
+# {} keeps the SQLite defaults. Measure with ``manage.py benchmark_sqlite``.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# Cached responses must be seen by every worker process, so the default
+# cache has to be shared: files on this host here, memcached for several
+# hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# SQLite file of the counters shared by the workers of this host: the
+# generation keys of api.cache, the throttle buckets and the cache hit/miss
+# and throttle counts, which are added to it every COUNTER_FLUSH_INTERVAL
+# seconds.
+COUNTERS_DATABASE = os.path.join(BASE_DIR, 'counters.sqlite3')
+COUNTER_FLUSH_INTERVAL = 10
+
+# Aliases of DATABASES that serve the reads of GET/HEAD requests. A client
+# that wrote reads from 'default' for REPLICA_PIN_SECONDS afterwards.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
+# Time SQL, serialization and rendering of every request for the
+# Server-Timing header and the histograms at /metrics, which add up the
+# requests of all the workers.
+METRICS_ENABLED = True
+# Addresses allowed to read /metrics without an admin token, e.g. the
+# Prometheus server.
+METRICS_ALLOWED_IPS = []
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -130,21 +184,79 @@ AUTH_USER_MODEL = 'api.User'
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Mail queued by the API is delivered by ``manage.py send_outbox``: up to
+# OUTBOX_BATCH_SIZE messages per connection, failed ones are retried after
+# OUTBOX_RETRY_DELAY seconds, doubled on every attempt.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+# Seconds a batch taken by one ``send_outbox`` stays hidden from the others;
+# messages of a sender that died are sent again after it.
+OUTBOX_CLAIM_TIMEOUT = 300
+# Age after which ``manage.py prune_outbox`` deletes sent or failed mail.
+OUTBOX_RETENTION = timedelta(days=7)
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Clients are identified by REMOTE_ADDR; X-Forwarded-For is only read
+    # behind this many trusted proxies, otherwise it could be spoofed.
+    'NUM_PROXIES': 0,
+    # Token buckets of api.throttling: burst size / full refill period.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': '10/min',
+        'write-ip': '60/min',
+        'write-user': '20/min',
+    },
 }
 
 AUTH_USER_MODEL = 'api.User'
 
+TITLE_FACETS_CACHE_TIMEOUT = 300
+
+# Largest list accepted by the bulk create/update endpoints.
+BULK_MAX_ITEMS = 1000
+
+# Default and largest number of log entries per /changes/ page.
+CHANGES_PAGE_SIZE = 500
+
+# Age after which ``manage.py prune_changes`` deletes log entries; clients
+# must poll /changes/ more often than this to resume from their token.
+CHANGES_RETENTION = timedelta(days=30)
+
+# Seconds to keep cached catalogue list/detail responses, 0 disables it.
+RESPONSE_CACHE_TIMEOUT = 60
+
+# Seconds between keep-alive comments on idle review event streams.
+SSE_HEARTBEAT_INTERVAL = 15
+
+# Users kept per process for requests that need the full ``User`` row.
+USER_CACHE_SIZE = 1024
+
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=500),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=10),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
+
+# In-memory filter of revoked token ids: bits, hash functions, how often
+# (seconds) ids revoked by other processes are loaded from the denylist and
+# how often it is rebuilt without the expired ids. Expired rows are deleted
+# by ``manage.py prune_revoked_tokens``. A token revoked, or outdated by a
+# change of the user's role or activity, in one worker process can still be
+# accepted by the others for up to REVOCATION_SYNC_INTERVAL seconds.
+REVOCATION_FILTER_SIZE = 2 ** 20
+REVOCATION_FILTER_HASHES = 7
+REVOCATION_SYNC_INTERVAL = 30
+REVOCATION_REBUILD_INTERVAL = 24 * 60 * 60
@@ -1,4 +1,11 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -121,3 +128,17 @@ def create_comments(user_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def run_in_worker(code):
+    """Run ``code`` in a separate process, like another server worker.
+
+    It uses the test settings, cache and database of this process.
+    """
+    subprocess.run(
+        [sys.executable, '-c', 'import django; django.setup()\n'
+         + textwrap.dedent(code)],
+        check=True, cwd=settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'tests.settings',
+             'YAMDB_TEST_DATABASE': connection.settings_dict['NAME']},
+    )
@@ -1,4 +1,15 @@
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_replica',
     # 'tests.fixtures.fixture_data',
 ]
+
+
+def pytest_unconfigure(config):
+    import shutil
+
+    from django.conf import settings
+
+    if settings.configured and hasattr(settings, 'STATE_DIR'):
+        shutil.rmtree(settings.STATE_DIR, ignore_errors=True)
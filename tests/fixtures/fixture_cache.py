@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from api.authentication import user_cache
+    from api.cache import event_counts
+    from api.counters import counters
+    from api.metrics import registry
+    from api.revocation import revocation_list
+
+    cache.clear()
+    counters.clear()
+    event_counts.clear()
+    user_cache.clear()
+    revocation_list.clear()
+    registry.clear()
+    yield
+    cache.clear()
+    counters.clear()
+    event_counts.clear()
+    user_cache.clear()
+    revocation_list.clear()
@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings):
+    """Add a second SQLite database standing in for a read replica.
+
+    It is only used by tests that list it in ``databases`` and set
+    ``DATABASE_REPLICAS``.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    settings.DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': settings.DATABASES['default']['NAME'] + '.replica',
+    }
+    # Django 3.2+ fills in the defaults of all aliases up front, older
+    # versions do it when the alias is first used.
+    if hasattr(connections, 'configure_settings'):
+        connections.configure_settings(settings.DATABASES)
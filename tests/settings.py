@@ -0,0 +1,37 @@
+"""Project settings with the cache, the counters and the test database
+kept in a temporary directory, away from the files of a running server.
+
+``run_in_worker`` processes inherit the directory through the environment
+and open the test database named by ``YAMDB_TEST_DATABASE``.
+"""
+import os
+import tempfile
+
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import CACHES, DATABASES
+
+if 'YAMDB_TEST_STATE_DIR' not in os.environ:
+    os.environ['YAMDB_TEST_STATE_DIR'] = tempfile.mkdtemp(
+        prefix='yamdb-tests-')
+STATE_DIR = os.environ['YAMDB_TEST_STATE_DIR']
+
+CACHES = {
+    **CACHES,
+    'default': {**CACHES['default'],
+                'LOCATION': os.path.join(STATE_DIR, 'cache')},
+}
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        # A file, unlike the default in-memory database, can be opened by
+        # the worker processes of the tests.
+        'TEST': {'NAME': os.path.join(STATE_DIR, 'test.sqlite3')},
+    },
+}
+
+COUNTERS_DATABASE = os.path.join(STATE_DIR, 'counters.sqlite3')
+
+if 'YAMDB_TEST_DATABASE' in os.environ:
+    DATABASES['default']['NAME'] = os.environ['YAMDB_TEST_DATABASE']
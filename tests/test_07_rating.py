@@ -0,0 +1,150 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Review, ScoreCounter, Title
+
+from .common import (auth_client, create_comments, create_reviews,
+                     create_titles)
+
+
+class Test07RatingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_stored(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count) == (12, 3), \
+            'Проверьте, что при создании отзыва обновляются `score_sum` и `score_count` произведения'
+        assert title.rating == 4, \
+            'Проверьте, что при создании отзыва обновляется `rating` произведения'
+
+        client_user = auth_client(user)
+        client_user.patch(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/', data={'score': 9})
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (18, 3, 6), \
+            'Проверьте, что при изменении оценки отзыва пересчитывается `rating` произведения'
+
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (13, 2, 6.5), \
+            'Проверьте, что при удалении отзыва пересчитывается `rating` произведения'
+
+        user.delete()
+        moderator.delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (0, 0, None), \
+            'Проверьте, что при каскадном удалении отзывов `rating` произведения сбрасывается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_without_review_queries(self, user_client, admin):
+        create_reviews(user_client, admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert not [q for q in queries.captured_queries if 'api_review' in q['sql']], \
+            'Проверьте, что при GET запросе `/api/v1/titles/` `rating` читается без запросов к отзывам'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_ratings(self, user_client, admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(score_sum=1, score_count=1, rating=1)
+        Review.objects.filter(pk=reviews[0]['id']).update(score=8)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (15, 3, 5), \
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинги по отзывам'
+        call_command('rebuild_ratings', '--check')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rating_histogram(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/rating-histogram/'
+        response = client.get(url)
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/rating-histogram/` возвращается статус 200'
+        data = response.json()
+        assert data['count'] == 3 and data['rating'] == 4
+        assert data['histogram'] == {**{str(score): 0 for score in range(1, 11)}, '3': 1, '4': 1, '5': 1}, \
+            'Проверьте, что `/api/v1/titles/{title_id}/rating-histogram/` возвращает количество отзывов по оценкам'
+
+        auth_client(user).patch(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/', data={'score': 5})
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[2]["id"]}/')
+        histogram = client.get(url).json()['histogram']
+        assert (histogram['3'], histogram['4'], histogram['5']) == (0, 0, 2), \
+            'Проверьте, что счётчики оценок обновляются при изменении и удалении отзывов'
+
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert 'score_histogram' not in response.json()
+        response = client.get('/api/v1/titles/', {'histogram': 1})
+        by_id = {title['id']: title for title in response.json()['results']}
+        assert by_id[titles[0]['id']]['score_histogram'] == histogram, \
+            'Проверьте, что `?histogram=1` добавляет `score_histogram` в данные произведения'
+        for value in ('0', 'false', 'no'):
+            response = client.get('/api/v1/titles/', {'histogram': value})
+            assert 'score_histogram' not in response.json()['results'][0], \
+                f'Проверьте, что `?histogram={value}` не добавляет `score_histogram`'
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/', {'histogram': 'true'})
+        assert response.json()['score_histogram'] == histogram
+
+        moderator.delete()
+        call_command('rebuild_ratings', '--check')
+        ScoreCounter.objects.filter(title_id=titles[0]['id'], score=5).update(count=7)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        assert client.get(url).json()['histogram']['5'] == 2, \
+            'Проверьте, что команда `rebuild_ratings` исправляет счётчики оценок'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_and_comment_counts(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        response = client.get('/api/v1/titles/')
+        by_id = {title['id']: title for title in response.json()['results']}
+        assert by_id[titles[0]['id']]['review_count'] == 3 and by_id[titles[1]['id']]['review_count'] == 0, \
+            'Проверьте, что `/api/v1/titles/` возвращает `review_count`'
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        by_id = {review['id']: review for review in client.get(url).json()['results']}
+        assert by_id[reviews[0]['id']]['comment_count'] == 3, \
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/` возвращает `comment_count`'
+
+        user_client.delete(f'{url}{reviews[0]["id"]}/comments/{comments[0]["id"]}/')
+        assert client.get(f'{url}{reviews[0]["id"]}/').json()['comment_count'] == 2, \
+            'Проверьте, что `comment_count` уменьшается при удалении комментария'
+        user.delete()
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 1, \
+            'Проверьте, что `comment_count` обновляется при каскадном удалении комментариев'
+        assert client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()['review_count'] == 2
+        call_command('rebuild_ratings', '--check')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_stale_title_save_keeps_rating(self, user_client, admin):
+        titles, _, _ = create_titles(user_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        user_client.post(f'/api/v1/titles/{title.pk}/reviews/', data={'text': 'qwerty', 'score': 8})
+        title.description = 'Новое описание'
+        title.save()
+        title = Title.objects.get(pk=title.pk)
+        assert (title.score_sum, title.score_count, title.rating) == (8, 1, 8), \
+            'Проверьте, что сохранение загруженного ранее произведения не перезаписывает `score_sum`, `score_count` и `rating`'
+        assert title.description == 'Новое описание'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_stale_review_save_keeps_comment_count(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review.pk}/'
+        user_client.post(f'{url}comments/', data={'text': 'qwerty'})
+        review.text = 'Новый текст'
+        review.save()
+        review = Review.objects.get(pk=review.pk)
+        assert review.comment_count == 1, \
+            'Проверьте, что сохранение загруженного ранее отзыва не перезаписывает `comment_count`'
+        assert review.text == 'Новый текст'
+        assert user_client.patch(url, data={'score': 9}).status_code == 200
+        assert Review.objects.get(pk=review.pk).comment_count == 1
+        call_command('rebuild_ratings', '--check')
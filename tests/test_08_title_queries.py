@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Genre, Title
+
+
+def create_titles_orm(count):
+    category = Category.objects.create(name='Фильм', slug=f'films-{count}')
+    genres = [
+        Genre.objects.create(name='Ужасы', slug=f'horror-{count}'),
+        Genre.objects.create(name='Комедия', slug=f'comedy-{count}'),
+    ]
+    titles = Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(count)
+    )
+    for title in Title.objects.filter(category=category):
+        title.genre.set(genres)
+    return titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+class Test08TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_list_queries_flat(self, client):
+        create_titles_orm(5)
+        small = count_queries(client, '/api/v1/titles/')
+        create_titles_orm(45)
+        large = count_queries(client, '/api/v1/titles/')
+        assert small == large, \
+            'Проверьте, что количество запросов при GET запросе `/api/v1/titles/` ' \
+            f'не зависит от количества произведений: {small} против {large}'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, django_assert_max_num_queries):
+        create_titles_orm(10)
+        title = Title.objects.first()
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert len(response.json()['genre']) == 2, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` возвращаются жанры произведения'
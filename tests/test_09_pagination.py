@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, Title
+
+
+def walk_cursor(client, url):
+    ids = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, \
+            f'Проверьте, что при GET запросе `{url}` с курсорной пагинацией возвращается статус 200'
+        data = response.json()
+        assert 'count' not in data, \
+            'Проверьте, что курсорная пагинация не считает `count`'
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+        pages += 1
+    return ids, pages
+
+
+class Test09PaginationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client):
+        Title.objects.bulk_create(Title(name=f'Произведение {i}', year=2000) for i in range(150))
+        ids, pages = walk_cursor(client, '/api/v1/titles/?pagination=cursor')
+        assert pages == 2, \
+            'Проверьте, что при GET запросе `/api/v1/titles/?pagination=cursor` данные разбиты на страницы'
+        assert ids == sorted(Title.objects.values_list('id', flat=True)), \
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` возвращает все объекты по порядку без повторов'
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 150, \
+            'Проверьте, что без параметра `pagination` сохраняется постраничная пагинация с `count`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor(self, client, admin):
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        review = Review.objects.create(title=title, author=admin, text='qwerty', score=5)
+        Comment.objects.bulk_create(
+            Comment(reviews=review, author=admin, text=f'Комментарий {i}') for i in range(120))
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/?pagination=cursor'
+        with CaptureQueriesContext(connection) as queries:
+            ids, pages = walk_cursor(client, url)
+        assert pages == 2 and len(set(ids)) == 120, \
+            'Проверьте, что курсорная пагинация комментариев возвращает все объекты без повторов'
+        assert not [q for q in queries.captured_queries if 'COUNT(' in q['sql']], \
+            'Проверьте, что курсорная пагинация не выполняет `COUNT(*)`'
+
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/?pagination=cursor')
+        assert response.status_code == 200 and len(response.json()['results']) == 1, \
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/?pagination=cursor` ' \
+            'возвращаются отзывы'
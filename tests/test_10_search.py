@@ -0,0 +1,42 @@
+import pytest
+
+from api.models import Title
+
+
+def search(client, query):
+    response = client.get('/api/v1/titles/', {'search': query})
+    assert response.status_code == 200, \
+        'Проверьте, что при GET запросе `/api/v1/titles/?search=` возвращается статус 200'
+    return [title['name'] for title in response.json()['results']]
+
+
+class Test10SearchAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_case_folding(self, client):
+        Title.objects.create(name='Побег из Шоушенка', year=1994, description='Тюремная драма')
+        Title.objects.create(name='Крестный отец', year=1972, description='Семейная сага')
+        assert search(client, 'шоушенка') == ['Побег из Шоушенка'], \
+            'Проверьте, что поиск `?search=` не зависит от регистра кириллицы'
+        assert search(client, 'ПОБЕГ шоу') == ['Побег из Шоушенка'], \
+            'Проверьте, что поиск `?search=` находит произведения по началу слов'
+        assert search(client, 'сага') == ['Крестный отец'], \
+            'Проверьте, что поиск `?search=` ищет по описанию произведения'
+        assert search(client, '"*') == [], \
+            'Проверьте, что поиск `?search=` без слов ничего не находит'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_search_ranking_and_updates(self, client):
+        Title.objects.create(name='Отец', year=2000, description='')
+        Title.objects.create(name='Сын', year=2000, description='Отец и сын')
+        assert search(client, 'отец') == ['Отец', 'Сын'], \
+            'Проверьте, что совпадения в названии ранжируются выше совпадений в описании'
+
+        title = Title.objects.get(name='Отец')
+        title.name = 'Мать'
+        title.save()
+        assert search(client, 'мать') == ['Мать'], \
+            'Проверьте, что индекс поиска обновляется при изменении произведения'
+        Title.objects.get(name='Сын').delete()
+        assert search(client, 'отец') == [], \
+            'Проверьте, что индекс поиска обновляется при удалении произведения'
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles, run_in_worker
+
+
+class Test11FacetsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facets(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        response = client.get('/api/v1/titles/facets/')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/titles/facets/` возвращается статус 200'
+        data = response.json()
+        assert {row['slug']: row['count'] for row in data['genre']} == {
+            'horror': 1, 'comedy': 1, 'drama': 1}, \
+            'Проверьте, что `/api/v1/titles/facets/` возвращает количество произведений по жанрам'
+        assert {row['slug']: row['count'] for row in data['category']} == {
+            'films': 1, 'books': 1}, \
+            'Проверьте, что `/api/v1/titles/facets/` возвращает количество произведений по категориям'
+        assert data['year'] == [{'year': 2000, 'count': 1}, {'year': 2020, 'count': 1}], \
+            'Проверьте, что `/api/v1/titles/facets/` возвращает количество произведений по годам'
+
+        response = client.get('/api/v1/titles/facets/', {'genre': 'comedy'})
+        data = response.json()
+        assert data['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'horror', 'name': 'Ужасы', 'count': 1},
+        ], \
+            'Проверьте, что `/api/v1/titles/facets/` учитывает параметры фильтрации `TitleFilter`'
+        assert data['year'] == [{'year': 2000, 'count': 1}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facets_cache(self, client, user_client, django_assert_num_queries):
+        titles, _, _ = create_titles(user_client)
+        client.get('/api/v1/titles/facets/')
+        with django_assert_num_queries(0):
+            client.get('/api/v1/titles/facets/')
+
+        user_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                          data={'genre': ['horror'], 'category': 'books'})
+        data = client.get('/api/v1/titles/facets/').json()
+        assert {row['slug']: row['count'] for row in data['genre']} == {
+            'horror': 2, 'comedy': 1}, \
+            'Проверьте, что кеш `/api/v1/titles/facets/` сбрасывается при изменении жанров произведения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_facets_cache_shared_by_workers(self, client, user_client):
+        create_titles(user_client)
+        client.get('/api/v1/titles/facets/')
+        run_in_worker('''
+            from api.cache import bump_generation
+            bump_generation('title-facets')
+        ''')
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/facets/')
+        assert context.captured_queries, \
+            'Проверьте, что сброс кеша `/api/v1/titles/facets/` в другом процессе виден всем процессам'
@@ -0,0 +1,77 @@
+import pytest
+
+from django.core.cache import cache
+
+from api.cache import get_stats, make_key
+
+from .common import create_titles, run_in_worker
+
+
+class Test12ResponseCacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cache_hit_and_invalidation(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        stats = get_stats('catalogue')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', \
+            'Проверьте, что повторный GET запрос `/api/v1/titles/{title_id}/` отдаётся из кеша'
+        assert response.json()['rating'] is None
+
+        user_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/', data={'text': 'qwerty', 'score': 8})
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS' and response.json()['rating'] == 8, \
+            'Проверьте, что кеш `/api/v1/titles/{title_id}/` сбрасывается при создании отзыва'
+
+        client.get('/api/v1/genres/')
+        user_client.post('/api/v1/genres/', data={'name': 'Мюзикл', 'slug': 'musical'})
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == 4, \
+            'Проверьте, что кеш `/api/v1/genres/` сбрасывается при создании жанра'
+        assert get_stats('catalogue') == {'hit': stats['hit'] + 1, 'miss': stats['miss'] + 4}, \
+            'Проверьте, что кеш ответов считает попадания и промахи'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_key_by_role_and_query(self, client, user_client):
+        create_titles(user_client)
+        client.get('/api/v1/categories/')
+        response = user_client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS', \
+            'Проверьте, что кеш ответов не разделяется между ролями пользователей'
+        response = client.get('/api/v1/categories/', {'search': 'Книги'})
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == 1, \
+            'Проверьте, что ключ кеша ответов учитывает параметры запроса'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_shared_by_workers(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        # A write handled by another worker bumps the generation there.
+        misses = get_stats('catalogue')['miss']
+        run_in_worker(f'''
+            from api.cache import bump_generation, get_stats
+            assert get_stats('catalogue')['miss'] == {misses}
+            bump_generation('catalogue')
+        ''')
+        assert client.get(url)['X-Cache'] == 'MISS', \
+            'Проверьте, что запись в другом процессе сбрасывает кеш ответов во всех процессах'
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_generation_survives_cache_culling(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        stale = make_key('catalogue', 'stale')
+        cache.set(stale, 'stale')
+        user_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/', data={'text': 'qwerty', 'score': 8})
+        # A full cache culls entries at random, the generation keys included.
+        cache.clear()
+        cache.set(stale, 'stale')
+        assert make_key('catalogue', 'stale') != stale, \
+            'Проверьте, что поколения кеша ответов не хранятся в вытесняемом кеше'
+        assert client.get(url).json()['rating'] == 8
@@ -0,0 +1,28 @@
+import pytest
+from django.core.management import call_command
+
+from api.models import Change, ChangeKind, Comment, Review, Title, User
+
+
+class Test13ImportCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_csv(self, client):
+        call_command('import_csv', '--drop-indexes', '--batch-size', '10')
+        assert User.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Title.objects.get(pk=1).genre.count() > 0, \
+            'Проверьте, что команда `import_csv` загружает связи произведений и жанров'
+        assert Review.objects.count() == 73, \
+            'Проверьте, что команда `import_csv` пропускает повторные отзывы автора на произведение'
+        assert Comment.objects.get(pk=1).pub_date.year == 2020, \
+            'Проверьте, что команда `import_csv` сохраняет `pub_date` из файла'
+        call_command('rebuild_ratings', '--check')
+
+        response = client.get('/api/v1/titles/1/')
+        assert response.json()['rating'] == 10, \
+            'Проверьте, что после `import_csv` рейтинги произведений пересчитаны'
+        assert set(Change.objects.filter(kind=ChangeKind.TITLE).values_list('object_id', flat=True)) == set(
+            Title.objects.values_list('pk', flat=True)), \
+            'Проверьте, что команда `import_csv` записывает загруженные объекты в журнал изменений'
+        assert Change.objects.filter(kind=ChangeKind.COMMENT).count() == Comment.objects.count()
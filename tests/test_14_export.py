@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.export import iter_catalogue
+
+from .common import auth_client, create_reviews
+
+
+class Test14ExportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_permissions(self, client, user_client, admin):
+        _, _, user, _ = create_reviews(user_client, admin)
+        response = client.get('/api/v1/export/')
+        assert response.status_code == 401, \
+            'Проверьте, что при GET запросе `/api/v1/export/` без токена возвращается статус 401'
+        response = auth_client(user).get('/api/v1/export/')
+        assert response.status_code == 403, \
+            'Проверьте, что `/api/v1/export/` доступен только администратору'
+        response = user_client.get('/api/v1/export/', {'output': 'xml'})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_ndjson_and_csv(self, user_client, admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        response = user_client.get('/api/v1/export/')
+        assert response.status_code == 200 and response.streaming, \
+            'Проверьте, что `/api/v1/export/` отдаёт потоковый ответ'
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert [record['id'] for record in records] == [title['id'] for title in titles]
+        assert records[0]['rating'] == 4 and len(records[0]['reviews']) == 3, \
+            'Проверьте, что выгрузка NDJSON содержит рейтинг и отзывы произведения'
+        assert sorted(records[0]['genres']) == ['comedy', 'horror']
+
+        response = user_client.get('/api/v1/export/', {'output': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert len(rows) == len(reviews) + 1, \
+            'Проверьте, что выгрузка CSV содержит строку на каждый отзыв и на произведение без отзывов'
+
+        out = io.StringIO()
+        call_command('export_catalogue', '--chunk-size', '1', stdout=out)
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == records, \
+            'Проверьте, что команда `export_catalogue` выгружает те же данные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_streams_reviews(self, user_client, admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            records = list(iter_catalogue())
+        assert [len(record['reviews']) for record in records] == [3, 0]
+        assert [review['id'] for review in records[0]['reviews']] == sorted(review['id'] for review in reviews)
+        assert len(context.captured_queries) <= 4, \
+            'Проверьте, что экспорт читает произведения, жанры и отзывы фиксированным числом запросов на порцию'
+
+        with CaptureQueriesContext(connection) as context:
+            list(iter_catalogue(chunk_size=1))
+        review_queries = [query['sql'] for query in context.captured_queries
+                          if query['sql'].startswith('SELECT "api_review"')]
+        assert review_queries and all('BETWEEN' in sql or '>=' in sql for sql in review_queries), \
+            'Проверьте, что отзывы читаются по диапазону `title_id` порции, а не одним списком'
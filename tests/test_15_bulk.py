@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+
+from api.models import Genre, Title
+
+from .common import auth_client, create_genre, create_titles, create_users_api
+
+
+class Test15BulkAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_bulk(self, user_client):
+        create_genre(user_client)
+        user, _ = create_users_api(user_client)
+        data = [{'name': 'Мюзикл', 'slug': 'musical'}]
+        response = auth_client(user).post('/api/v1/genres/bulk/', data=data, format='json')
+        assert response.status_code == 403, \
+            'Проверьте, что `/api/v1/genres/bulk/` доступен только администратору'
+
+        data = [
+            {'name': 'Мюзикл', 'slug': 'musical'},
+            {'name': 'Хоррор', 'slug': 'horror'},
+            {'name': 'Без слага'},
+            {'name': 'Мюзикл 2', 'slug': 'musical'},
+        ]
+        response = user_client.post('/api/v1/genres/bulk/', data=data, format='json')
+        assert response.status_code == 200, \
+            'Проверьте, что при POST запросе `/api/v1/genres/bulk/` возвращается статус 200'
+        result = response.json()
+        assert [genre['slug'] for genre in result['results']] == ['musical', 'horror']
+        assert [error['index'] for error in result['errors']] == [2, 3], \
+            'Проверьте, что `/api/v1/genres/bulk/` возвращает ошибки для каждого элемента'
+        assert Genre.objects.get(slug='horror').name == 'Хоррор', \
+            'Проверьте, что `/api/v1/genres/bulk/` обновляет существующие жанры по слагу'
+
+        response = user_client.post('/api/v1/categories/bulk/', data={'name': 'x'}, format='json')
+        assert response.status_code == 400, \
+            'Проверьте, что `/api/v1/categories/bulk/` принимает только список'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_bulk(self, user_client, django_assert_max_num_queries):
+        titles, _, _ = create_titles(user_client)
+        data = [
+            {'name': f'Произведение {i}', 'year': 2000 + i, 'genre': ['horror', 'drama'], 'category': 'films'}
+            for i in range(20)
+        ]
+        data.append({'name': 'Ошибка', 'year': 2000, 'genre': ['unknown']})
+        data.append({'id': titles[0]['id'], 'name': 'Поворот обратно', 'genre': ['drama']})
+        with django_assert_max_num_queries(20):
+            response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 200, \
+            'Проверьте, что при POST запросе `/api/v1/titles/bulk/` возвращается статус 200'
+        result = response.json()
+        assert len(result['results']) == 21
+        assert result['errors'] == [{'index': 20, 'errors': {'genre': ['Жанр не найден: unknown']}}], \
+            'Проверьте, что `/api/v1/titles/bulk/` возвращает ошибки для каждого элемента'
+        assert Title.objects.count() == 22
+        assert sorted(Title.objects.get(name='Произведение 5').genre.values_list('slug', flat=True)) == [
+            'drama', 'horror'], \
+            'Проверьте, что `/api/v1/titles/bulk/` сохраняет жанры произведений'
+        updated = Title.objects.get(pk=titles[0]['id'])
+        assert updated.name == 'Поворот обратно' and list(updated.genre.values_list('slug', flat=True)) == ['drama'], \
+            'Проверьте, что `/api/v1/titles/bulk/` обновляет произведения с `id`'
+
+        response = user_client.get('/api/v1/titles/', {'search': 'обратно'})
+        assert response.json()['count'] == 1, \
+            'Проверьте, что `/api/v1/titles/bulk/` обновляет индекс поиска'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_bulk_without_returning(self, user_client, django_assert_max_num_queries, monkeypatch):
+        create_titles(user_client)
+        monkeypatch.setattr(type(connection.features), 'can_return_rows_from_bulk_insert', False)
+        data = [
+            {'name': f'Произведение {i}', 'year': 2000 + i, 'genre': ['horror'], 'category': 'films'}
+            for i in range(20)
+        ]
+        with django_assert_max_num_queries(20):
+            response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 200
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == list(Title.objects.filter(name__startswith='Произведение').order_by(
+            'year').values_list('id', flat=True)), \
+            'Проверьте, что `/api/v1/titles/bulk/` возвращает id созданных произведений, если база не умеет RETURNING'
+        assert Title.objects.get(pk=ids[5]).genre.get().slug == 'horror'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_titles_bulk_duplicates(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        data = [
+            {'name': 'Повтор жанра', 'year': 2000, 'genre': ['horror', 'horror']},
+            {'id': titles[0]['id'], 'name': 'Первое изменение'},
+            {'id': titles[0]['id'], 'name': 'Второе изменение'},
+        ]
+        response = user_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 200
+        result = response.json()
+        assert len(result['results']) == 2
+        assert result['errors'] == [{'index': 2, 'errors': {'id': ['Произведение повторяется в запросе']}}], \
+            'Проверьте, что `/api/v1/titles/bulk/` возвращает ошибку для повторяющегося `id`'
+        assert Title.objects.get(pk=titles[0]['id']).name == 'Первое изменение'
+        assert list(Title.objects.get(name='Повтор жанра').genre.values_list('slug', flat=True)) == ['horror'], \
+            'Проверьте, что повторяющиеся жанры произведения сохраняются один раз'
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, Title, User
+
+from .common import create_comments
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+class Test16NestedQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_and_comments_queries_flat(self, client, admin):
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        review = Review.objects.create(title=title, author=admin, text='qwerty', score=5)
+
+        def add(count, start):
+            users = User.objects.bulk_create(
+                User(username=f'user{i}', email=f'user{i}@yamdb.fake') for i in range(start, start + count))
+            users = User.objects.filter(username__in=[user.username for user in users])
+            Review.objects.bulk_create(Review(title=title, author=user, text='x', score=3) for user in users)
+            Comment.objects.bulk_create(Comment(reviews=review, author=user, text='x') for user in users)
+
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        comments_url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        add(3, 0)
+        small = count_queries(client, reviews_url), count_queries(client, comments_url)
+        add(30, 3)
+        large = count_queries(client, reviews_url), count_queries(client, comments_url)
+        assert small == large, \
+            'Проверьте, что количество запросов к спискам отзывов и комментариев не зависит от их количества'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comment_review_title_pair(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        wrong = f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        response = client.get(wrong)
+        assert response.status_code == 404, \
+            'Проверьте, что комментарии отзыва недоступны по адресу другого произведения'
+        response = client.get(f'{wrong}{comments[0]["id"]}/')
+        assert response.status_code == 404
+        response = user_client.post(wrong, data={'text': 'qwerty'})
+        assert response.status_code == 404, \
+            'Проверьте, что нельзя создать комментарий к отзыву по адресу другого произведения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_create_relies_on_constraint(self, user_client, admin):
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 201
+        assert not [q for q in queries.captured_queries
+                    if q['sql'].startswith('SELECT') and 'FROM "api_review"' in q['sql']], \
+            'Проверьте, что перед созданием отзыва не выполняется проверка существующего отзыва'
+
+        response = user_client.post(url, data={'text': 'qwerty', 'score': 3})
+        assert response.status_code == 400 and response.json() == {'non_field_errors': ['Not Allowed']}, \
+            'Проверьте, что повторный отзыв автора на произведение возвращает статус 400'
+        title.refresh_from_db()
+        assert (title.score_count, title.rating) == (1, 5), \
+            'Проверьте, что отклонённый отзыв не меняет рейтинг произведения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_review_create_on_deleted_title(self, user_client, admin, monkeypatch):
+        from api import views
+
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        check_exists = views.check_exists
+
+        def delete_title_after_check(queryset, **lookup):
+            # The title is deleted between the check and the insert.
+            check_exists(queryset, **lookup)
+            if queryset.model is Title:
+                Title.objects.filter(pk=title.id).delete()
+
+        monkeypatch.setattr(views, 'check_exists', delete_title_after_check)
+        response = user_client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 404, \
+            'Проверьте, что отзыв на удалённое произведение возвращает статус 404, а не `Not Allowed`'
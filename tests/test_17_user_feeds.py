@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+
+from .common import create_comments
+
+
+class Test17UserFeedsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_reviews_and_comments(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        user_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'второй', 'score': 9})
+
+        response = client.get(f'/api/v1/users/{admin.username}/reviews/')
+        assert response.status_code == 200, \
+            'Проверьте, что при GET запросе `/api/v1/users/{username}/reviews/` возвращается статус 200'
+        data = response.json()
+        assert [review['text'] for review in data['results']] == ['второй', 'qwerty'], \
+            'Проверьте, что `/api/v1/users/{username}/reviews/` возвращает отзывы пользователя, новые первыми'
+        assert 'next' in data and 'count' not in data, \
+            'Проверьте, что `/api/v1/users/{username}/reviews/` использует курсорную пагинацию'
+
+        response = client.get(f'/api/v1/users/{user.username}/comments/')
+        assert [comment['id'] for comment in response.json()['results']] == [comments[1]['id']], \
+            'Проверьте, что `/api/v1/users/{username}/comments/` возвращает комментарии пользователя'
+        response = client.get('/api/v1/users/nobody/comments/')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_feed_indexes(self):
+        with connection.cursor() as cursor:
+            for table in ('api_review', 'api_comment'):
+                cursor.execute(
+                    f'EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE author_id = 1 ORDER BY pub_date DESC, id DESC')
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+                assert 'author_pub_date_idx' in plan and 'TEMP B-TREE' not in plan, \
+                    f'Проверьте, что лента пользователя по `{table}` использует индекс (author, pub_date): {plan}'
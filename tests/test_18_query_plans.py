@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+def list_query_plans(client, url, table):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    selects = [q['sql'] for q in queries.captured_queries
+               if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql'] and 'ORDER BY' in q['sql']]
+    assert selects, f'Не найден запрос списка к `{table}`'
+    plans = []
+    with connection.cursor() as cursor:
+        for sql in selects:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+    return plans
+
+
+class Test18QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_review_and_comment_list_plans(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        for url, table in ((reviews_url, 'api_review'), (comments_url, 'api_comment'),
+                           (f'{reviews_url}?pagination=cursor', 'api_review'),
+                           (f'{comments_url}?pagination=cursor', 'api_comment')):
+            for plan in list_query_plans(client, url, table):
+                assert 'TEMP B-TREE' not in plan, \
+                    f'Проверьте, что список `{url}` не сортируется во временном B-дереве: {plan}'
+                assert f'SCAN {table}' not in plan, \
+                    f'Проверьте, что список `{url}` не сканирует всю таблицу `{table}`: {plan}'
@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import Change
+
+from .common import create_comments, create_titles
+
+
+def poll(client, since, **params):
+    response = client.get('/api/v1/changes/', {'since': since, **params})
+    assert response.status_code == 200, \
+        'Проверьте, что при GET запросе `/api/v1/changes/` возвращается статус 200'
+    return response.json()
+
+
+class Test19ChangesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_changes_feed(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        data = poll(client, 0)
+        kinds = {(change['type'], change['id']) for change in data['changes']}
+        assert {('title', titles[0]['id']), ('review', reviews[0]['id']), ('comment', comments[0]['id'])} <= kinds, \
+            'Проверьте, что `/api/v1/changes/` возвращает созданные произведения, отзывы и комментарии'
+        title = next(change for change in data['changes']
+                     if change['type'] == 'title' and change['id'] == titles[0]['id'])
+        assert title['data']['rating'] == 4, \
+            'Проверьте, что `/api/v1/changes/` возвращает актуальные данные объектов'
+        token = data['next']
+        assert poll(client, token)['changes'] == [], \
+            'Проверьте, что `/api/v1/changes/` не возвращает изменения до переданного токена'
+
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        data = poll(client, token)
+        tombstones = {(change['type'], change['id']) for change in data['changes'] if change['deleted']}
+        assert tombstones == {('review', reviews[0]['id'])} | {('comment', comment['id']) for comment in comments}, \
+            'Проверьте, что `/api/v1/changes/` возвращает удаления, включая каскадные'
+        updated = [change for change in data['changes'] if change['type'] == 'title']
+        assert updated[0]['data']['rating'] == 3.5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_changes_paging(self, client, user_client, admin):
+        create_comments(user_client, admin)
+        seen, token, pages = [], 0, 0
+        while True:
+            data = poll(client, token, limit=2)
+            seen.extend(change['token'] for change in data['changes'])
+            token = data['next']
+            pages += 1
+            if not data['has_more']:
+                break
+        assert pages > 2 and len(seen) == len(set(seen)), \
+            'Проверьте, что `/api/v1/changes/` постранично отдаёт журнал по `limit`'
+        response = client.get('/api/v1/changes/', {'since': 'abc'})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_prune_changes(self, client, user_client, admin):
+        create_comments(user_client, admin)
+        stale_token = poll(client, 0, limit=1)['next']
+        current_token = poll(client, 0)['next']
+        newest = Change.objects.latest('id')
+        Change.objects.update(created=timezone.now() - datetime.timedelta(days=31))
+        Change.objects.filter(id__gte=newest.id - 1).update(created=timezone.now())
+
+        call_command('prune_changes')
+        assert list(Change.objects.values_list('id', flat=True)) == [newest.id - 1, newest.id], \
+            'Проверьте, что `prune_changes` удаляет записи журнала старше `CHANGES_RETENTION`'
+        response = client.get('/api/v1/changes/', {'since': stale_token})
+        assert response.status_code == 410, \
+            'Проверьте, что токен, после которого записи удалены, отклоняется со статусом 410'
+        assert poll(client, current_token)['changes'] == [], \
+            'Проверьте, что токен последнего изменения остаётся действительным'
+        assert len(poll(client, newest.id - 2)['changes']) == 2, \
+            'Проверьте, что токен перед самой старой записью журнала остаётся действительным'
+
+        Change.objects.update(created=timezone.now() - datetime.timedelta(days=31))
+        call_command('prune_changes')
+        assert list(Change.objects.values_list('id', flat=True)) == [newest.id], \
+            'Проверьте, что `prune_changes` сохраняет последнюю запись журнала'
+        assert poll(client, current_token)['changes'] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_renames_change_titles(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        token = poll(client, 0)['next']
+        user_client.post('/api/v1/genres/bulk/', data=[{'name': 'Хоррор', 'slug': 'horror'}], format='json')
+        data = poll(client, token)
+        changed = {change['id'] for change in data['changes'] if change['type'] == 'title'}
+        assert changed == {title['id'] for title in titles if 'horror' in title['genre']}, \
+            'Проверьте, что переименование жанра записывает в журнал изменения его произведений'
+        assert any(genre['name'] == 'Хоррор' for change in data['changes'] for genre in change['data']['genre'])
+
+        token = data['next']
+        user_client.delete('/api/v1/categories/films/')
+        changed = {change['id'] for change in poll(client, token)['changes']}
+        assert changed == {title['id'] for title in titles if title['category'] == 'films'}, \
+            'Проверьте, что удаление категории записывает в журнал изменения её произведений'
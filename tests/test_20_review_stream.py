@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+from api.streams import broker
+from api_yamdb.asgi import application
+
+from .common import auth_client, create_titles, create_users_api
+
+
+def stream_scope(title_id, method='GET'):
+    return {
+        'type': 'http', 'method': method, 'scheme': 'http',
+        'path': f'/api/v1/titles/{title_id}/reviews/stream/',
+        'query_string': b'', 'headers': [], 'server': ('testserver', 80),
+    }
+
+
+def parse_events(body):
+    events = []
+    for chunk in body.decode().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in chunk.splitlines()
+                     if not line.startswith(':'))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+async def read_events(communicator, count):
+    body = b''
+    while len(parse_events(body)) < count:
+        message = await communicator.receive_output(timeout=5)
+        body += message['body']
+    return parse_events(body)
+
+
+class Test20ReviewStreamAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stream_reviews(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        user, moderator = create_users_api(user_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        async def scenario():
+            communicator = ApplicationCommunicator(
+                application, stream_scope(title_id))
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=5)
+            assert start['status'] == 200
+            assert (b'content-type', b'text/event-stream') in start['headers'], \
+                'Проверьте, что поток отзывов отдаётся как `text/event-stream`'
+            await communicator.receive_output(timeout=5)
+
+            post = sync_to_async(lambda client, score: client.post(
+                url, data={'text': 'Отзыв', 'score': score}))
+            await post(auth_client(user), 4)
+            await post(auth_client(moderator), 10)
+            events = await read_events(communicator, 4)
+
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=5)
+            return events
+
+        events = asyncio.run(scenario())
+        assert [event for event, _ in events] == ['review', 'rating', 'review', 'rating'], \
+            'Проверьте, что поток отправляет новые отзывы и обновлённый рейтинг'
+        assert events[0][1]['author'] == 'TestUser1234'
+        assert events[3][1] == {'id': title_id, 'rating': 7, 'review_count': 2}, \
+            'Проверьте, что событие `rating` содержит актуальный рейтинг произведения'
+        assert not broker.has_subscribers(title_id), \
+            'Проверьте, что после отключения клиента подписка удаляется'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_stream_errors(self):
+        async def request(scope):
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=5)
+            await communicator.wait(timeout=5)
+            return start['status']
+
+        assert asyncio.run(request(stream_scope(999))) == 404, \
+            'Проверьте, что поток несуществующего произведения возвращает 404'
+        assert asyncio.run(request(stream_scope(999, 'POST'))) == 405
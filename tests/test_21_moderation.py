@@ -0,0 +1,97 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import moderation
+from api.aggregates import (rebuild_comment_counts, rebuild_histograms,
+                            rebuild_ratings)
+from api.models import Change, Comment, Review, Title
+
+from .common import auth_client, create_comments
+
+
+class Test21ModerationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_moderation_permissions(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        data = {'ids': [reviews[0]['id']]}
+        response = client.post('/api/v1/moderation/reviews/', data=data, format='json')
+        assert response.status_code == 401, \
+            'Проверьте, что модерация недоступна без токена'
+        response = auth_client(user).post('/api/v1/moderation/reviews/', data=data, format='json')
+        assert response.status_code == 403, \
+            'Проверьте, что модерация недоступна обычному пользователю'
+        response = auth_client(moderator).post('/api/v1/moderation/reviews/', data={}, format='json')
+        assert response.status_code == 400, \
+            'Проверьте, что модерация без условий отбора возвращает статус 400'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_moderate_reviews(self, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client(moderator).post(
+                '/api/v1/moderation/reviews/', data={'author': admin.username}, format='json')
+        assert response.status_code == 200, \
+            'Проверьте, что модератор может удалить отзывы по автору'
+        assert response.json() == {'reviews': 1, 'comments': 3, 'titles': [titles[0]['id']]}, \
+            'Проверьте, что модерация возвращает количество удалённых отзывов и комментариев'
+        deletes = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith(('DELETE FROM "api_review"', 'DELETE FROM "api_comment"'))]
+        assert len(deletes) == 2, \
+            'Проверьте, что отзывы и комментарии удаляются одним запросом на таблицу'
+
+        assert not Review.objects.filter(pk=reviews[0]['id']).exists()
+        assert not Comment.objects.exists()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_count, title.rating) == (2, 3.5), \
+            'Проверьте, что рейтинг произведения пересчитан после модерации'
+        assert not rebuild_ratings(fix=False) and not rebuild_histograms(fix=False)
+        tombstones = set(Change.objects.filter(deleted=True).values_list('kind', 'object_id'))
+        assert ('review', reviews[0]['id']) in tombstones
+        assert {('comment', comment['id']) for comment in comments} <= tombstones, \
+            'Проверьте, что модерация записывает удаления в журнал изменений'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_moderate_comments(self, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        response = user_client.post('/api/v1/moderation/comments/', data={
+            'ids': [comments[0]['id'], comments[1]['id']],
+            'since': '2000-01-01T00:00:00Z',
+        }, format='json')
+        assert response.status_code == 200, \
+            'Проверьте, что администратор может удалить комментарии по списку id'
+        assert response.json() == {'comments': 2, 'reviews': [reviews[0]['id']]}
+        assert list(Comment.objects.values_list('id', flat=True)) == [comments[2]['id']]
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 1, \
+            'Проверьте, что счётчик комментариев пересчитан после модерации'
+        assert not rebuild_comment_counts(fix=False)
+
+        response = user_client.post('/api/v1/moderation/comments/', data={
+            'until': '2000-01-01T00:00:00Z'}, format='json')
+        assert response.json() == {'comments': 0, 'reviews': []}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rows_added_during_moderation(self, user_client, admin, monkeypatch):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        original = moderation.record_deletions
+        late = []
+
+        def record_deletions(kind, queryset):
+            if not late:
+                # A comment by the same author committed while the
+                # moderation request is being handled.
+                late.append(Comment.objects.create(
+                    text='Поздний', author=admin, reviews_id=reviews[1]['id']))
+            original(kind, queryset)
+
+        monkeypatch.setattr(moderation, 'record_deletions', record_deletions)
+        response = auth_client(moderator).post(
+            '/api/v1/moderation/comments/', data={'author': admin.username}, format='json')
+        assert response.status_code == 200
+        deleted = set(Change.objects.filter(kind='comment', deleted=True).values_list('object_id', flat=True))
+        assert late[0].pk in deleted and not Comment.objects.filter(pk__in=deleted).exists(), \
+            'Проверьте, что модерация записывает в журнал ровно удалённые комментарии'
+        assert response.json()['comments'] == len(deleted)
+        assert Review.objects.get(pk=reviews[1]['id']).comment_count == \
+            Comment.objects.filter(reviews_id=reviews[1]['id']).count()
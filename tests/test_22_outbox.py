@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import OutboxMessage
+from api.outbox import claim_batch, enqueue_mail, send_batch
+
+
+class Test22OutboxAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_confirmation_code_queued(self, client):
+        response = client.post('/api/v1/auth/email/', data={'email': 'new@yamdb.fake'})
+        assert response.status_code == 200, \
+            'Проверьте, что при POST запросе `/api/v1/auth/email/` возвращается статус 200'
+        assert len(mail.outbox) == 0, \
+            'Проверьте, что `/api/v1/auth/email/` не отправляет письмо во время запроса'
+        message = OutboxMessage.objects.get()
+        assert message.to_email == 'new@yamdb.fake' and message.sent is None, \
+            'Проверьте, что `/api/v1/auth/email/` кладёт письмо в очередь'
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1 and mail.outbox[0].to == ['new@yamdb.fake'], \
+            'Проверьте, что `send_outbox` отправляет письма из очереди'
+        message.refresh_from_db()
+        assert message.sent is not None
+        assert message.body == '', \
+            'Проверьте, что после отправки текст письма с кодом подтверждения не хранится'
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1, \
+            'Проверьте, что `send_outbox` не отправляет письмо повторно'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_outbox_retry(self, client, settings, tmp_path):
+        for index in range(3):
+            get_user_model().objects.create(
+                username=f'user{index}', email=f'user{index}@yamdb.fake')
+            client.post('/api/v1/auth/email/', data={'email': f'user{index}@yamdb.fake'})
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = tmp_path / 'not-a-directory'
+        settings.EMAIL_FILE_PATH.write_text('')
+
+        assert send_batch() == (0, 3)
+        messages = OutboxMessage.objects.all()
+        assert all(message.attempts == 1 and message.last_error for message in messages), \
+            'Проверьте, что неудачная отправка увеличивает счётчик попыток'
+        assert send_batch() == (0, 0), \
+            'Проверьте, что повторная отправка откладывается'
+
+        messages.update(send_after=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+        settings.EMAIL_FILE_PATH = tmp_path / 'mail'
+        assert send_batch(batch_size=2) == (2, 0)
+        assert send_batch(batch_size=2) == (1, 0)
+        assert not OutboxMessage.objects.filter(sent__isnull=True).exists()
+        assert len(list((tmp_path / 'mail').iterdir())) == 2, \
+            'Проверьте, что пачка писем отправляется через одно соединение'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_outbox_claim(self):
+        enqueue_mail('Код', 'Код: 1', 'admin@yamdb.fake', [f'user{index}@yamdb.fake' for index in range(3)])
+        now = timezone.now()
+        assert len(claim_batch(now, 2)) == 2
+        assert [message.pk for message in claim_batch(now, 2)] == [OutboxMessage.objects.last().pk], \
+            'Проверьте, что письма, взятые одним отправителем, не берутся другим'
+        assert send_batch() == (0, 0)
+        assert len(claim_batch(now + datetime.timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT), 3)) == 3, \
+            'Проверьте, что письма отправителя, не завершившего отправку, снова отправляются'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_prune_outbox(self):
+        enqueue_mail('Код', 'Код: 1', 'admin@yamdb.fake', [f'user{index}@yamdb.fake' for index in range(3)])
+        call_command('send_outbox')
+        old = timezone.now() - settings.OUTBOX_RETENTION - datetime.timedelta(days=1)
+        first, second, third = OutboxMessage.objects.all()
+        OutboxMessage.objects.filter(pk=first.pk).update(sent=old)
+        OutboxMessage.objects.filter(pk=second.pk).update(
+            sent=None, attempts=settings.OUTBOX_MAX_ATTEMPTS, send_after=old)
+        call_command('prune_outbox')
+        assert list(OutboxMessage.objects.values_list('pk', flat=True)) == [third.pk], \
+            'Проверьте, что `prune_outbox` удаляет старые отправленные и недоставленные письма'
@@ -0,0 +1,118 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import User
+
+from .common import create_reviews
+
+
+def token_client(client, user):
+    response = client.post('/api/v1/auth/token/', data={
+        'email': user.email,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 200, \
+        'Проверьте, что при POST запросе `/api/v1/auth/token/` с верным кодом возвращается статус 200'
+    authorized = APIClient()
+    authorized.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["Your token"]}')
+    return authorized
+
+
+def user_lookups(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'WHERE "api_user"."id" =' in query['sql']]
+
+
+class Test23TokenClaimsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions_from_claims(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        admin_client = token_client(client, admin)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 200
+        assert not user_lookups(context), \
+            'Проверьте, что права администратора проверяются по токену без запроса пользователя'
+
+        user_client_ = token_client(client, user)
+        assert user_client_.get('/api/v1/users/').status_code == 403, \
+            'Проверьте, что обычному пользователю запрещён доступ по данным токена'
+        moderator_client = token_client(client, moderator)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.patch(url, data={'text': 'Исправлено'})
+        assert response.status_code == 200, \
+            'Проверьте, что модератор может изменять чужие отзывы'
+        assert not user_lookups(context), \
+            'Проверьте, что роль модератора берётся из токена'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_full_user_cache(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        user_client_ = token_client(client, user)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response = user_client_.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+
+        response = user_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert response.status_code == 200
+        assert token_client(client, user).get('/api/v1/users/').status_code == 200, \
+            'Проверьте, что новый токен содержит изменённую роль'
+        assert user_client_.get('/api/v1/users/me/').status_code == 401, \
+            'Проверьте, что смена роли отзывает токены, выданные со старой ролью'
+        response = token_client(client, user).patch('/api/v1/users/me/', data={'bio': 'Новый профиль'})
+        assert response.json()['role'] == 'admin', \
+            'Проверьте, что `/api/v1/users/me/` использует актуальные данные пользователя'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_demotion_revokes_tokens(self, client, user_client, admin):
+        demoted = User.objects.create(username='demoted', email='demoted@yamdb.fake', role='admin')
+        demoted_client = token_client(client, demoted)
+        other_client = token_client(client, admin)
+        assert demoted_client.get('/api/v1/users/').status_code == 200
+
+        demoted = User.objects.get(pk=demoted.pk)
+        demoted.role = 'user'
+        demoted.is_active = False
+        demoted.save()
+        assert demoted_client.get('/api/v1/users/').status_code == 401, \
+            'Проверьте, что после понижения роли старый токен администратора не действует'
+        response = demoted_client.post('/api/v1/genres/', data={'name': 'Мюзикл', 'slug': 'musical'})
+        assert response.status_code == 401
+        assert other_client.get('/api/v1/users/').status_code == 200, \
+            'Проверьте, что отзываются только токены изменённого пользователя'
+
+        demoted.bio = 'Профиль'
+        demoted.save()
+        assert User.objects.get(pk=demoted.pk).token_version == 1, \
+            'Проверьте, что версия токенов меняется только при изменении роли или активности'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_deletion_revokes_tokens(self, client, admin):
+        deleted = User.objects.create(username='deleted', email='deleted@yamdb.fake', role='admin')
+        deleted_client = token_client(client, deleted)
+        assert deleted_client.get('/api/v1/users/').status_code == 200
+        User.objects.filter(pk=deleted.pk).delete()
+        assert deleted_client.get('/api/v1/users/').status_code == 401, \
+            'Проверьте, что токены удалённого пользователя не действуют'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_queryset_update_revokes_tokens(self, client, admin):
+        demoted = User.objects.create(username='demoted', email='demoted@yamdb.fake', role='admin')
+        demoted_client = token_client(client, demoted)
+        other_client = token_client(client, admin)
+        assert demoted_client.get('/api/v1/users/').status_code == 200
+
+        User.objects.filter(pk=demoted.pk).update(bio='Профиль')
+        assert demoted_client.get('/api/v1/users/').status_code == 200, \
+            'Проверьте, что изменение профиля не отзывает токены'
+        User.objects.filter(role='admin').update(role='user')
+        assert demoted_client.get('/api/v1/users/').status_code == 401, \
+            'Проверьте, что `QuerySet.update()` роли отзывает выданные токены'
+        assert User.objects.get(pk=demoted.pk).token_version == 1
+        assert other_client.get('/api/v1/users/').status_code == 200
@@ -0,0 +1,117 @@
+import datetime
+import threading
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import RevokedToken
+from api.revocation import BloomFilter, revocation_list
+
+
+def obtain_tokens(client, user):
+    response = client.post('/api/v1/auth/token/', data={
+        'email': user.email,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert 'refresh' in data, \
+        'Проверьте, что `/api/v1/auth/token/` возвращает refresh токен'
+    return data
+
+
+def bearer(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+class Test24TokenRefreshAPI:
+
+    def test_01_bloom_filter(self):
+        bloom = BloomFilter(2 ** 12, 5)
+        keys = [f'token-{index}' for index in range(100)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys), \
+            'Проверьте, что фильтр не даёт ложноотрицательных ответов'
+        assert sum(f'other-{index}' in bloom for index in range(1000)) < 50
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_refresh_and_rotate(self, client, admin):
+        tokens = obtain_tokens(client, admin)
+        response = client.post('/api/v1/auth/token/refresh/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 200, \
+            'Проверьте, что `/api/v1/auth/token/refresh/` выдаёт новый access токен'
+        assert bearer(response.json()['Your token']).get('/api/v1/users/').status_code == 200
+
+        response = client.post('/api/v1/auth/token/rotate/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 200, \
+            'Проверьте, что `/api/v1/auth/token/rotate/` выдаёт новую пару токенов'
+        rotated = response.json()
+        assert rotated['refresh'] != tokens['refresh']
+        response = client.post('/api/v1/auth/token/rotate/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 401, \
+            'Проверьте, что использованный при ротации refresh токен отозван'
+        assert bearer(tokens['Your token']).get('/api/v1/users/').status_code == 401, \
+            'Проверьте, что access токены отозванного refresh токена отклоняются'
+        assert bearer(rotated['Your token']).get('/api/v1/users/').status_code == 200
+        response = client.post('/api/v1/auth/token/refresh/', data={'refresh': 'garbage'})
+        assert response.status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_revocation_probe(self, client, admin):
+        tokens = obtain_tokens(client, admin)
+        user_client = bearer(tokens['Your token'])
+        user_client.get('/api/v1/users/')
+        with CaptureQueriesContext(connection) as context:
+            user_client.get('/api/v1/users/')
+        assert not any('api_revokedtoken' in query['sql'] for query in context.captured_queries), \
+            'Проверьте, что проверка отзыва не обращается к базе данных'
+
+        response = client.post('/api/v1/auth/token/revoke/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/').status_code == 401
+
+        revocation_list.clear()
+        assert revocation_list.is_revoked(RevokedToken.objects.get().jti), \
+            'Проверьте, что фильтр восстанавливается из сохранённого списка'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_prune_expired_revocations(self, client, admin, settings):
+        tokens = obtain_tokens(client, admin)
+        client.post('/api/v1/auth/token/revoke/', data={'refresh': tokens['refresh']})
+        RevokedToken.objects.create(jti='expired', expires=timezone.now() - datetime.timedelta(seconds=1))
+
+        call_command('prune_revoked_tokens')
+        assert not RevokedToken.objects.filter(jti='expired').exists(), \
+            'Проверьте, что `prune_revoked_tokens` удаляет записи с истёкшим сроком'
+        assert RevokedToken.objects.count() == 1, \
+            'Проверьте, что `prune_revoked_tokens` сохраняет действующие записи'
+        assert bearer(tokens['Your token']).get('/api/v1/users/').status_code == 401
+
+        revocation_list.revoke_id('old', timezone.now() - datetime.timedelta(seconds=1))
+        assert 'old' in revocation_list.filter
+        settings.REVOCATION_REBUILD_INTERVAL = 0
+        settings.REVOCATION_SYNC_INTERVAL = 0
+        revocation_list.sync()
+        assert 'old' not in revocation_list.filter, \
+            'Проверьте, что фильтр перестраивается без истёкших токенов'
+        assert revocation_list.is_revoked(RevokedToken.objects.exclude(jti='old').get().jti)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_sync_does_not_block(self, settings):
+        revocation_list.sync()
+        revocation_list.synced -= settings.REVOCATION_SYNC_INTERVAL
+        with revocation_list.lock:
+            # Another thread is loading the denylist.
+            lookup = threading.Thread(target=revocation_list.is_revoked, args=('unknown',))
+            lookup.start()
+            lookup.join(5)
+            assert not lookup.is_alive(), \
+                'Проверьте, что проверка токена не ждёт обновления фильтра в другом потоке'
@@ -0,0 +1,80 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from api.cache import get_stats
+from api.counters import counters
+from api.throttling import TokenBucketThrottle
+
+from .common import auth_client, create_reviews, run_in_worker
+
+RATES = {'auth': '2/min', 'write-ip': '100/min', 'write-user': '2/min'}
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES}
+
+
+class Test25ThrottlingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_auth_throttle(self, client, rates):
+        get_user_model().objects.create(username='throttled', email='throttled@yamdb.fake')
+        data = {'email': 'throttled@yamdb.fake'}
+        for _ in range(2):
+            assert client.post('/api/v1/auth/email/', data=data).status_code == 200
+        response = client.post('/api/v1/auth/email/', data=data)
+        assert response.status_code == 429, \
+            'Проверьте, что частые запросы к `/api/v1/auth/email/` ограничиваются'
+        assert int(response['Retry-After']) == 30, \
+            'Проверьте, что ответ 429 содержит заголовок `Retry-After`'
+        assert client.post('/api/v1/auth/token/', data=data).status_code == 429, \
+            'Проверьте, что `/api/v1/auth/token/` использует то же ограничение'
+        assert get_stats('throttle', ('auth',)) == {'auth': 2}, \
+            'Проверьте, что отклонённые запросы подсчитываются'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_write_throttle(self, user_client, admin, rates, monkeypatch):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        counters.clear()
+        now = [1000.0]
+        monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        client_user = auth_client(user)
+        for _ in range(2):
+            assert client_user.post(url, data={'text': 'Спам'}).status_code == 201
+        assert client_user.post(url, data={'text': 'Спам'}).status_code == 429, \
+            'Проверьте, что частое создание комментариев ограничивается для пользователя'
+        assert client_user.get(url).status_code == 200, \
+            'Проверьте, что чтение не ограничивается'
+        assert auth_client(moderator).post(url, data={'text': 'Ответ'}).status_code == 201, \
+            'Проверьте, что ограничение считается отдельно для каждого пользователя'
+        now[0] += 30
+        assert client_user.post(url, data={'text': 'Спам'}).status_code == 201, \
+            'Проверьте, что ограничение восполняется со временем'
+        assert client_user.post(url, data={'text': 'Спам'}).status_code == 429
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_forwarded_for_is_ignored(self, client, rates):
+        get_user_model().objects.create(username='throttled', email='throttled@yamdb.fake')
+        data = {'email': 'throttled@yamdb.fake'}
+        statuses = [
+            client.post('/api/v1/auth/email/', data=data, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+            for i in range(3)
+        ]
+        assert statuses == [200, 200, 429], \
+            'Проверьте, что ограничение по IP нельзя обойти подменой заголовка `X-Forwarded-For`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bucket_shared_by_workers(self, client):
+        get_user_model().objects.create(username='throttled', email='throttled@yamdb.fake')
+        # Another worker takes the whole burst of the default rate.
+        run_in_worker('''
+            from django.test import RequestFactory
+            from api.throttling import AuthIPThrottle
+            request = RequestFactory().post('/api/v1/auth/email/')
+            assert all(AuthIPThrottle().allow_request(request, None) for _ in range(10))
+        ''')
+        response = client.post('/api/v1/auth/email/', data={'email': 'throttled@yamdb.fake'})
+        assert response.status_code == 429, \
+            'Проверьте, что ограничение частоты запросов общее для всех процессов'
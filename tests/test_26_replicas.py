@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.authentication import issue_tokens
+from api.models import Category, Title
+
+REPLICA = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+def claims_client(user):
+    _, access = issue_tokens(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+def replicate():
+    Category.objects.using('replica').bulk_create(Category.objects.using('default').all())
+
+
+def category_slugs(client):
+    response = client.get('/api/v1/categories/')
+    assert response.status_code == 200
+    return [category['slug'] for category in response.json()['results']]
+
+
+class Test26ReplicasAPI:
+
+    @REPLICA
+    def test_01_reads_from_replica(self, client, admin, replicas):
+        admin_client = claims_client(admin)
+        response = admin_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        assert response.status_code == 201
+        assert Category.objects.using('default').filter(slug='films').exists(), \
+            'Проверьте, что запись выполняется в основную базу данных'
+        assert not Category.objects.using('replica').exists()
+
+        assert category_slugs(client) == [], \
+            'Проверьте, что GET запросы читают из реплики'
+        replicate()
+        assert category_slugs(client) == ['films'], \
+            'Проверьте, что после репликации данные видны в реплике'
+
+    @REPLICA
+    def test_02_read_your_writes(self, client, admin, replicas):
+        admin_client = claims_client(admin)
+        admin_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        assert category_slugs(admin_client) == ['films'], \
+            'Проверьте, что после записи клиент читает из основной базы'
+        assert category_slugs(client) == [], \
+            'Проверьте, что другие клиенты продолжают читать из реплики'
+
+        cache.clear()
+        assert category_slugs(admin_client) == [], \
+            'Проверьте, что чтение из основной базы ограничено по времени'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_without_replicas(self, client, user_client):
+        user_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        assert category_slugs(client) == ['films'], \
+            'Проверьте, что без реплик все запросы идут в основную базу'
+
+    @REPLICA
+    def test_04_pin_survives_token_refresh(self, client, admin, replicas):
+        claims_client(admin).post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        assert category_slugs(claims_client(admin)) == ['films'], \
+            'Проверьте, что чтение из основной базы привязано к пользователю, а не к токену доступа'
+        bad_token = APIClient()
+        bad_token.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        assert bad_token.get('/api/v1/categories/').status_code == 401
+
+    @REPLICA
+    def test_05_streaming_from_replica(self, admin, replicas):
+        Title.objects.using('replica').bulk_create([Title(name='Из реплики', year=2000)])
+        response = claims_client(admin).get('/api/v1/export/')
+        assert response.status_code == 200 and response.streaming
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert [record['name'] for record in records] == ['Из реплики'], \
+            'Проверьте, что потоковые ответы читают из реплики и после возврата из представления'
@@ -0,0 +1,30 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+class Test27SqliteAPI:
+
+    @pytest.mark.django_db
+    def test_01_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA temp_store')
+            temp_store = cursor.fetchone()[0]
+        assert (busy_timeout, synchronous, temp_store) == (5000, 1, 2), \
+            'Проверьте, что `SQLITE_PRAGMAS` применяются к новым соединениям'
+
+    def test_02_benchmark(self):
+        out = StringIO()
+        call_command('benchmark_sqlite', seconds=0.2, readers=2, writers=1, transactions=2,
+                     rows=100, titles=10, stdout=out)
+        lines = out.getvalue().splitlines()
+        assert [line.split()[0] for line in lines[1:]] == ['default', 'pragmas'], \
+            'Проверьте, что `benchmark_sqlite` сравнивает настройки по умолчанию и `SQLITE_PRAGMAS`'
+        assert all(len(line.split()) == 5 for line in lines[1:]), \
+            'Проверьте, что `benchmark_sqlite` измеряет транзакции с чтением и записью'
@@ -0,0 +1,80 @@
+import re
+
+import pytest
+
+from api.metrics import registry
+
+from .common import auth_client, create_titles, create_users_api, run_in_worker
+
+
+class Test28MetricsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, user_client):
+        create_titles(user_client)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        timing = response['Server-Timing']
+        assert [part.split(';')[0] for part in timing.split(', ')] == \
+            ['db', 'serialize', 'render', 'total'], \
+            'Проверьте, что ответ содержит заголовок `Server-Timing` с временем SQL, сериализации, рендеринга и общим'
+        queries = int(re.search(r'desc="(\d+) queries"', timing).group(1))
+        assert queries > 0, \
+            'Проверьте, что `Server-Timing` учитывает SQL запросы'
+        serialize = float(re.search(r'serialize;dur=([\d.]+)', timing).group(1))
+        total = float(re.search(r'total;dur=([\d.]+)', timing).group(1))
+        assert serialize <= total
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_metrics_endpoint(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        registry.clear()
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = user_client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'api_request_duration_seconds_count{method="GET",route="api/v1/titles/"} 1' in body, \
+            'Проверьте, что `/metrics` содержит гистограмму времени запросов по эндпоинтам'
+        assert 'route="api/v1/titles/<pk>/"} 2' in body, \
+            'Проверьте, что запросы группируются по шаблону URL, а не по пути'
+        assert 'api_db_queries_bucket{method="GET",route="api/v1/titles/",le="+Inf"} 1' in body
+        for name in ('api_db_duration_seconds', 'api_serialize_duration_seconds',
+                     'api_render_duration_seconds'):
+            assert f'# TYPE {name} histogram' in body
+        assert 'api_cache_events_total{group="catalogue",event="hit"} 1' in body, \
+            'Проверьте, что `/metrics` содержит счётчики кеша'
+        assert 'api_throttled_requests_total{scope="auth"} 0' in body, \
+            'Проверьте, что `/metrics` содержит счётчики отклонённых запросов'
+
+    @pytest.mark.django_db
+    def test_03_disabled(self, client, user_client, settings):
+        settings.METRICS_ENABLED = False
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response
+        assert user_client.get('/metrics').status_code == 404
+
+    @pytest.mark.django_db
+    def test_04_metrics_access(self, client, user_client, admin, settings):
+        user, _ = create_users_api(user_client)
+        assert client.get('/metrics').status_code == 401, \
+            'Проверьте, что `/metrics` недоступен без токена'
+        assert auth_client(user).get('/metrics').status_code == 403, \
+            'Проверьте, что `/metrics` недоступен обычному пользователю'
+        settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+        assert client.get('/metrics').status_code == 200, \
+            'Проверьте, что `/metrics` доступен с адресов из `METRICS_ALLOWED_IPS`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_metrics_of_all_workers(self, client, user_client):
+        client.get('/api/v1/genres/')
+        run_in_worker('''
+            from api.metrics import RequestMetrics, registry
+            registry.observe('GET', 'api/v1/genres/', RequestMetrics())
+            registry.pending.flush()
+        ''')
+        body = user_client.get('/metrics').content.decode()
+        assert 'api_request_duration_seconds_count{method="GET",route="api/v1/genres/"} 2' in body, \
+            'Проверьте, что `/metrics` учитывает запросы всех процессов'